@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Answer Matcher - Comparación de comentarios contra la respuesta de la ronda
+La respuesta se normaliza y se prepara una sola vez por ronda; cada comentario
+solo se normaliza y se compara (exacto, contenido o 70% de las palabras).
+"""
+
+import re
+from typing import Optional, List
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+# Porcentaje mínimo de palabras de la respuesta que debe contener el comentario
+WORD_MATCH_RATIO = 0.7
+
+
+def normalize_text(text: str) -> str:
+    """Normalizar texto para comparación"""
+    text = text.upper().strip()
+    text = _PUNCTUATION.sub('', text)
+    text = _SPACES.sub(' ', text)
+    return text
+
+
+class AnswerMatcher:
+    """Respuesta de la ronda preparada para comparar muchos comentarios"""
+    __slots__ = ('answer', 'answer_words', 'required_words')
+
+    def __init__(self, answer: str):
+        self.answer = normalize_text(answer)
+        words = self.answer.split()
+        # La coincidencia por palabras solo aplica a respuestas de varias palabras
+        self.answer_words = words if len(words) > 1 else []
+        self.required_words = WORD_MATCH_RATIO * len(words)
+
+    def match(self, normalized_comment: str) -> Optional[str]:
+        """Tipo de coincidencia ('EXACTO', 'CONTENIDO', 'PALABRAS') o None"""
+        if normalized_comment == self.answer:
+            return 'EXACTO'
+        if self.answer in normalized_comment:
+            return 'CONTENIDO'
+        if self.answer_words:
+            comment_words = set(normalized_comment.split())
+            matches = sum(1 for word in self.answer_words if word in comment_words)
+            if matches >= self.required_words:
+                return 'PALABRAS'
+        return None
+
+    def match_batch(self, normalized_comments: List[str]) -> List[Optional[str]]:
+        """Comparar un lote de comentarios ya normalizados en una sola pasada"""
+        match = self.match
+        return [match(comment) for comment in normalized_comments]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Avatar Cache - Descarga anticipada de fotos de perfil a disco local
+Las fotos de los usuarios que comentan se descargan en segundo plano (pool
+acotado, sin descargas duplicadas) y se guardan por hash del contenido, para
+que el overlay del ganador las sirva desde Express sin esperar al CDN.
+Una sola instancia por directorio y proceso (AvatarCache.shared): todas las
+salas de un proceso comparten el mismo límite de tamaño.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict
+
+import aiohttp
+
+logger = logging.getLogger('TikTokLive')
+
+
+class AvatarCache:
+    _instances: Dict[Path, 'AvatarCache'] = {}
+
+    @classmethod
+    def shared(cls, cache_dir: Path, url_prefix: str = '/avatars', **kwargs) -> 'AvatarCache':
+        """Cache del proceso para ese directorio (se crea la primera vez)"""
+        key = cache_dir.resolve()
+        cache = cls._instances.get(key)
+        if cache is None:
+            cache = cls._instances[key] = cls(cache_dir, url_prefix, **kwargs)
+        return cache
+
+    def __init__(self, cache_dir: Path, url_prefix: str = '/avatars',
+                 max_bytes: int = 50 * 1024 * 1024, max_concurrency: int = 4,
+                 max_pending: int = 200, max_file_bytes: int = 2 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.max_file_bytes = max_file_bytes
+
+        # LRU de archivos en disco (nombre -> tamaño) y URL remota -> nombre
+        self.files: OrderedDict = OrderedDict()
+        self.total_bytes = 0
+        self.url_to_file: Dict[str, str] = {}
+
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        self.load_existing()
+
+    def load_existing(self):
+        """Registrar los archivos que ya estaban en disco (los más viejos primero)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            existing = sorted(
+                (p for p in self.cache_dir.iterdir() if p.is_file() and not p.name.endswith('.tmp')),
+                key=lambda p: p.stat().st_mtime
+            )
+            for path in existing:
+                size = path.stat().st_size
+                self.files[path.name] = size
+                self.total_bytes += size
+            self.evict()
+        except Exception as e:
+            logger.error(f"ERROR cargando cache de avatares: {e}")
+
+    def local_url(self, remote_url: Optional[str]) -> Optional[str]:
+        """URL local si el avatar ya está en disco (marca el archivo como usado)"""
+        if not remote_url or not isinstance(remote_url, str):
+            return None
+        filename = self.url_to_file.get(remote_url)
+        if filename is None or filename not in self.files:
+            return None
+        self.files.move_to_end(filename)
+        return f"{self.url_prefix}/{filename}"
+
+    def prefetch(self, remote_url: Optional[str]) -> Optional[asyncio.Task]:
+        """Programar la descarga (sin esperar); deduplica descargas en curso"""
+        # profile_picture puede llegar como objeto de imagen sin URLs: solo se descargan strings
+        if not isinstance(remote_url, str) or not remote_url.startswith('http'):
+            return None
+        if self.local_url(remote_url) is not None:
+            return None
+        task = self.inflight.get(remote_url)
+        if task is not None:
+            return task
+        if len(self.inflight) >= self.max_pending:
+            return None
+
+        task = asyncio.create_task(self.download(remote_url))
+        self.inflight[remote_url] = task
+        task.add_done_callback(lambda _: self.inflight.pop(remote_url, None))
+        return task
+
+    async def download(self, remote_url: str):
+        async with self.semaphore:
+            try:
+                if self.session is None or self.session.closed:
+                    self.session = aiohttp.ClientSession()
+
+                async with self.session.get(remote_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    if response.status != 200:
+                        logger.warning(f"AVATAR no descargado ({response.status}): {remote_url}")
+                        return
+                    if (response.content_length or 0) > self.max_file_bytes:
+                        return
+                    content = await response.read()
+                    content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+
+                if len(content) > self.max_file_bytes:
+                    return
+
+                extension = mimetypes.guess_extension(content_type) or '.img'
+                filename = hashlib.sha256(content).hexdigest()[:32] + extension
+
+                if filename not in self.files:
+                    await asyncio.get_running_loop().run_in_executor(None, self.write_file, filename, content)
+                    self.files[filename] = len(content)
+                    self.total_bytes += len(content)
+                    self.evict()
+
+                self.files.move_to_end(filename)
+                self.url_to_file[remote_url] = filename
+            except Exception as e:
+                logger.error(f"ERROR descargando avatar: {e}")
+
+    def write_file(self, filename: str, content: bytes):
+        path = self.cache_dir / filename
+        temp = path.with_name(path.name + '.tmp')
+        temp.write_bytes(content)
+        os.replace(temp, path)
+
+    def evict(self):
+        """Eliminar los archivos menos usados hasta quedar bajo el límite"""
+        while self.total_bytes > self.max_bytes and self.files:
+            filename, size = self.files.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                (self.cache_dir / filename).unlink()
+            except FileNotFoundError:
+                pass
+
+        if len(self.url_to_file) > 4 * max(1, len(self.files)):
+            self.url_to_file = {url: f for url, f in self.url_to_file.items() if f in self.files}
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Closest Guesses - Puntuación por lotes de los comentarios de la ronda
+Acumula los comentarios normalizados y los compara contra la respuesta actual
+usando histogramas de bigramas de caracteres (similitud coseno).
+"""
+
+import threading
+from collections import Counter, deque
+from typing import Optional, Dict, List, Tuple, Any
+
+# NumPy es opcional: si no está instalado se usa la versión en Python puro
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Número de casillas del histograma de bigramas
+HISTOGRAM_BINS = 512
+
+
+def bigram_indices(text: str) -> List[int]:
+    """Convertir un texto normalizado en índices de bigramas del histograma"""
+    padded = f" {text} "
+    return [
+        (ord(padded[i]) * 31 + ord(padded[i + 1])) % HISTOGRAM_BINS
+        for i in range(len(padded) - 1)
+    ]
+
+
+class ClosestGuessTracker:
+    """Buffer de comentarios de una ronda con puntuación periódica por lotes"""
+
+    def __init__(self, max_buffer: int = 5000, top_n: int = 5):
+        self.top_n = top_n
+        self.answer: Optional[str] = None
+        self.pending: deque = deque(maxlen=max_buffer)
+        # unique_id -> (score, username, comment)
+        self.best: Dict[str, Tuple[float, str, str]] = {}
+        self.lock = threading.Lock()
+
+        self._answer_counts: Counter = Counter()
+        self._answer_vector = None
+        self._answer_norm = 0.0
+
+    def reset(self, answer: Optional[str]):
+        """Iniciar una nueva ronda (answer ya normalizada, None para desactivar)"""
+        with self.lock:
+            self.answer = answer or None
+            self.pending.clear()
+            self.best = {}
+
+            indices = bigram_indices(answer) if answer else []
+            self._answer_counts = Counter(indices)
+            if np is not None:
+                vector = np.bincount(np.asarray(indices, dtype=np.int64), minlength=HISTOGRAM_BINS).astype(np.float32)
+                self._answer_vector = vector
+                self._answer_norm = float(np.linalg.norm(vector))
+            else:
+                self._answer_norm = sum(c * c for c in self._answer_counts.values()) ** 0.5
+
+    def add(self, unique_id: str, username: str, normalized_comment: str):
+        """Agregar un comentario normalizado al buffer (O(1), sin puntuar)"""
+        if self.answer and normalized_comment:
+            self.pending.append((unique_id, username, normalized_comment))
+
+    def score_pending(self) -> int:
+        """Puntuar todos los comentarios pendientes en un solo lote"""
+        with self.lock:
+            if not self.pending or not self._answer_norm:
+                self.pending.clear()
+                return 0
+            batch = list(self.pending)
+            self.pending.clear()
+
+            if np is not None:
+                scores = self._score_numpy(batch)
+            else:
+                scores = self._score_python(batch)
+
+            for (unique_id, username, comment), score in zip(batch, scores):
+                previous = self.best.get(unique_id)
+                if previous is None or score > previous[0]:
+                    self.best[unique_id] = (float(score), username, comment)
+
+            return len(batch)
+
+    def _score_numpy(self, batch: List[Tuple[str, str, str]]):
+        """Similitud coseno vectorizada de todo el lote contra la respuesta"""
+        # Todos los comentarios (con su espacio de relleno) en un solo arreglo de code points
+        padded = [f" {comment} " for _, _, comment in batch]
+        codes = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+
+        # Bigrama de cada posición con la siguiente, sin cruzar el límite entre comentarios
+        bins = (codes[:-1] * 31 + codes[1:]) % HISTOGRAM_BINS
+        rows = np.repeat(np.arange(len(batch), dtype=np.int64), lengths)[:-1]
+        keep = np.ones(len(bins), dtype=bool)
+        keep[np.cumsum(lengths)[:-1] - 1] = False
+
+        flat = rows[keep] * HISTOGRAM_BINS + bins[keep]
+        matrix = np.bincount(flat, minlength=len(batch) * HISTOGRAM_BINS)
+        matrix = matrix.reshape(len(batch), HISTOGRAM_BINS).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        return (matrix @ self._answer_vector) / (norms * self._answer_norm)
+
+    def _score_python(self, batch: List[Tuple[str, str, str]]) -> List[float]:
+        """Versión sin NumPy de la misma similitud coseno"""
+        scores = []
+        for _, _, comment in batch:
+            counts = Counter(bigram_indices(comment))
+            dot = sum(c * self._answer_counts.get(i, 0) for i, c in counts.items())
+            norm = sum(c * c for c in counts.values()) ** 0.5 or 1.0
+            scores.append(dot / (norm * self._answer_norm))
+        return scores
+
+    def top(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Obtener los N usuarios distintos con los comentarios más cercanos"""
+        with self.lock:
+            ranked = sorted(self.best.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            {
+                'unique_id': unique_id,
+                'username': username,
+                'comment': comment,
+                'score': round(score, 3)
+            }
+            for unique_id, (score, username, comment) in ranked[:n or self.top_n]
+        ]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Event Trace - Trazas por evento desde TikTok hasta Express
+Cada evento recibe un trace id y marcas de tiempo monotónicas por etapa
+(recibido, handler, cola, matcher, envío HTTP, confirmación). El retraso desde la
+creación del mensaje en TikTok hasta nuestro handler se guarda aparte como span
+'tiktok' (sin contar para el umbral de lentitud: depende del reloj de TikTok y de
+los mensajes viejos que llegan al conectar). Las trazas que superan el umbral
+desde 'recibido' se escriben (en un hilo aparte, con rotación por tamaño) en formato Trace
+Event (JSON Array) para abrirlas en chrome://tracing o https://ui.perfetto.dev
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Tuple
+
+logger = logging.getLogger('TikTokLive')
+
+# Prefijo por proceso + contador: ids únicos sin el costo de uuid4 por evento
+_TRACE_PREFIX = f"{os.getpid():x}{int(time.time()) & 0xffffff:06x}"
+_trace_counter = itertools.count(1)
+
+# Un solo hilo escribe las trazas de todo el proceso: en orden y fuera del event loop
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='event-trace')
+
+# Retrasos de TikTok fuera de [0, MAX_TIKTOK_DELAY_MS] se descartan (reloj desfasado o historial)
+MAX_TIKTOK_DELAY_MS = 60 * 1000
+
+
+def tiktok_create_time_ms(event: Any) -> Optional[float]:
+    """Hora de creación del mensaje en TikTok (ms epoch), si el evento la trae"""
+    common = getattr(event, 'common', None)
+    create_time = getattr(common, 'create_time', None)
+    return float(create_time) if create_time else None
+
+
+class EventTrace:
+    __slots__ = ('trace_id', 'event_type', 'start_wall_ms', 'tiktok_delay_ms', 'stages')
+
+    def __init__(self, event_type: str, created_ms: Optional[float] = None):
+        self.trace_id = f"{_TRACE_PREFIX}-{next(_trace_counter):x}"
+        self.event_type = event_type
+        self.start_wall_ms = time.time() * 1000
+        self.tiktok_delay_ms: Optional[float] = None
+        if created_ms is not None:
+            delay_ms = self.start_wall_ms - created_ms
+            if 0 <= delay_ms <= MAX_TIKTOK_DELAY_MS:
+                self.tiktok_delay_ms = delay_ms
+        self.stages: List[Tuple[str, int]] = [('received', time.perf_counter_ns())]
+
+    def mark(self, stage: str):
+        self.stages.append((stage, time.perf_counter_ns()))
+
+    def elapsed_ms(self) -> float:
+        return (self.stages[-1][1] - self.stages[0][1]) / 1e6
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Datos que viajan a Express: offsets en ms desde la recepción"""
+        origin = self.stages[0][1]
+        payload = {
+            'id': self.trace_id,
+            'start_ms': round(self.start_wall_ms, 3),
+            'stages': {name: round((ns - origin) / 1e6, 3) for name, ns in self.stages}
+        }
+        if self.tiktok_delay_ms is not None:
+            payload['tiktok_delay_ms'] = round(self.tiktok_delay_ms, 3)
+        return payload
+
+
+class EventTracer:
+    def __init__(self, trace_file: Path, slow_threshold_ms: float = 1000, max_bytes: int = 20 * 1024 * 1024):
+        self.trace_file = trace_file
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_bytes = max_bytes
+        self.slow_traces = 0
+
+    def start(self, event_type: str, event: Any = None) -> EventTrace:
+        """Nueva traza; con el evento de TikTok también se mide su retraso desde la creación"""
+        return EventTrace(event_type, tiktok_create_time_ms(event) if event is not None else None)
+
+    def finish(self, trace: Optional[EventTrace], express: Optional[Dict[str, Any]] = None):
+        """Cerrar una traza; si es lenta desde que llegó al handler se agrega al archivo de trazas"""
+        if trace is None:
+            return
+        total_ms = trace.elapsed_ms()
+        if express and express.get('express_handled_ms'):
+            total_ms = max(total_ms, express['express_handled_ms'] - trace.start_wall_ms)
+        if total_ms < self.slow_threshold_ms:
+            return
+
+        self.slow_traces += 1
+        logger.warning(f"TRAZA LENTA {trace.trace_id} ({trace.event_type}): {total_ms:.1f} ms")
+        events = self.trace_events(trace, express)
+        try:
+            asyncio.get_running_loop().run_in_executor(_writer, self.write, events)
+        except RuntimeError:
+            # Sin event loop (herramientas, pruebas): escribir directo
+            self.write(events)
+
+    def trace_events(self, trace: EventTrace, express: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Convertir la traza en eventos 'X' (duración) del formato Trace Event"""
+        origin = trace.stages[0][1]
+        start_us = trace.start_wall_ms * 1000
+        args = {'trace_id': trace.trace_id, 'event': trace.event_type}
+        events = []
+
+        if trace.tiktok_delay_ms is not None:
+            events.append({
+                'name': 'tiktok', 'cat': trace.event_type, 'ph': 'X', 'pid': 'tiktok', 'tid': trace.event_type,
+                'ts': start_us - trace.tiktok_delay_ms * 1000, 'dur': trace.tiktok_delay_ms * 1000, 'args': args
+            })
+
+        for (_, begin), (name, end) in zip(trace.stages, trace.stages[1:]):
+            events.append({
+                'name': name, 'cat': trace.event_type, 'ph': 'X', 'pid': 'python', 'tid': trace.event_type,
+                'ts': start_us + (begin - origin) / 1000, 'dur': (end - begin) / 1000, 'args': args
+            })
+
+        if express and express.get('express_received_ms') and express.get('express_handled_ms'):
+            events.append({
+                'name': 'express', 'cat': trace.event_type, 'ph': 'X', 'pid': 'express', 'tid': trace.event_type,
+                'ts': express['express_received_ms'] * 1000,
+                'dur': (express['express_handled_ms'] - express['express_received_ms']) * 1000,
+                'args': args
+            })
+        return events
+
+    def write(self, events: List[Dict[str, Any]]):
+        """Agregar eventos al archivo (corre en el hilo de escritura)"""
+        try:
+            # Al llegar al tamaño máximo el archivo pasa a .1.json (se descarta el anterior)
+            if self.trace_file.exists() and self.trace_file.stat().st_size >= self.max_bytes:
+                os.replace(self.trace_file, self.trace_file.with_suffix('.1.json'))
+
+            # Formato JSON Array sin ']' final: los visores lo aceptan y permite agregar al final
+            new_file = not self.trace_file.exists()
+            with open(self.trace_file, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write('[\n')
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + ',\n')
+        except Exception as e:
+            logger.error(f"ERROR escribiendo traza: {e}")
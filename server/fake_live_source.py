@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Fake Live Source - Fuente de eventos local para pruebas sin TikTok
+Reemplaza al cliente de TikTokLive con un cliente falso que emite una secuencia
+guionizada de eventos (connect, comment, gift con streaks, like, follow,
+disconnect, live_end) con tiempos controlados, de forma determinista.
+
+Formato del guion (lista JSON, un paso por evento):
+    {"type": "comment", "user": "ana", "text": "gato negro", "delay": 0.1}
+    {"type": "gift", "user": "luis", "gift_id": 5655, "gift_name": "Rose", "count": 5, "streakable": true}
+    {"type": "like", "user": "ana", "count": 15}
+    {"type": "follow", "user": "ana"}
+    {"type": "disconnect"} / {"type": "live_end"}
+    {"type": "round", "answer": "gato negro", "phrase": "...", "category": "..."}
+Los pasos "round" no son eventos de TikTok: activan la ronda mediante on_round
+(lo que en producción hace Node por stdin), para medir la latencia del ganador.
+"delay" son segundos antes del paso (divididos por la velocidad del source).
+
+Como el cliente real, cada handler corre en su propia tarea: un handler lento
+(p. ej. el POST a Express) no atrasa el guion. Con ordered=True cada handler se
+espera antes del siguiente evento, para pruebas que necesitan orden estricto.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional, Dict, List, Any, Callable
+
+logger = logging.getLogger('TikTokLive')
+
+# Nombre del evento del guion -> nombre de la clase de TikTokLive.events
+EVENT_CLASSES = {
+    'connect': 'ConnectEvent',
+    'comment': 'CommentEvent',
+    'gift': 'GiftEvent',
+    'like': 'LikeEvent',
+    'follow': 'FollowEvent',
+    'disconnect': 'DisconnectEvent',
+    'live_end': 'LiveEndEvent'
+}
+
+
+def fake_user(name: str) -> SimpleNamespace:
+    unique_id = name.replace('@', '').strip()
+    return SimpleNamespace(
+        unique_id=unique_id,
+        nickname=unique_id.capitalize(),
+        profile_picture=None
+    )
+
+
+class FakeLiveSource:
+    """Fuente de eventos falsa: crea clientes que comparten el mismo guion.
+    Al reconectar, el nuevo cliente continúa el guion donde quedó el anterior."""
+
+    def __init__(self, script: List[Dict[str, Any]], speed: float = 1.0, room_id: int = 7000000000000000000,
+                 ordered: bool = False):
+        self.script = script
+        self.speed = speed
+        self.room_id = room_id
+        self.ordered = ordered
+        self.cursor = 0
+        # Llamadas reales a connect() (no cuenta los clientes temporales de is_live)
+        self.connections = 0
+        self.handler_tasks: set = set()
+        self.emitted: Dict[str, int] = {}
+        self.started_at: Optional[float] = None
+        self.finished = asyncio.Event()
+        # Callback (phrase, answer, category, is_active) para los pasos "round"
+        self.on_round: Optional[Callable[[str, str, str, bool], None]] = None
+
+    @classmethod
+    def from_file(cls, path: Path, speed: float = 1.0, ordered: bool = False) -> 'FakeLiveSource':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), speed=speed, ordered=ordered)
+
+    def create_client(self, unique_id: str) -> 'FakeLiveClient':
+        return FakeLiveClient(self, unique_id)
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        total = sum(self.emitted.values())
+        return {
+            'emitted': dict(self.emitted),
+            'total': total,
+            'elapsed_s': round(elapsed, 3),
+            'events_per_second': round(total / elapsed, 1) if elapsed > 0 else None,
+            'connections': self.connections,
+            'cursor': self.cursor,
+            'script_length': len(self.script)
+        }
+
+
+class FakeLiveClient:
+    """Imita la interfaz usada de TikTokLiveClient: on(), connect(), disconnect(), is_live()"""
+
+    def __init__(self, source: FakeLiveSource, unique_id: str):
+        self.source = source
+        self.unique_id = unique_id
+        self.room_id: Optional[int] = None
+        self.handlers: Dict[str, List[Callable]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    def on(self, event_class):
+        name = getattr(event_class, '__name__', str(event_class))
+
+        def decorator(handler):
+            self.handlers.setdefault(name, []).append(handler)
+            return handler
+        return decorator
+
+    async def is_live(self) -> bool:
+        return self.source.cursor < len(self.source.script)
+
+    async def connect(self):
+        self.room_id = self.source.room_id
+        self.connected = True
+        self.source.connections += 1
+        if self.source.started_at is None:
+            self.source.started_at = time.perf_counter()
+        self.task = asyncio.create_task(self.run_script())
+
+    async def disconnect(self):
+        self.connected = False
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    async def emit(self, event_type: str, event: Any):
+        source = self.source
+        source.emitted[event_type] = source.emitted.get(event_type, 0) + 1
+        # Hora de creación "en TikTok" (la usa el tracer para la etapa 'received')
+        event.common = SimpleNamespace(create_time=time.time() * 1000)
+        for handler in self.handlers.get(EVENT_CLASSES[event_type], []):
+            if source.ordered:
+                await self.run_handler(handler, event_type, event)
+            else:
+                task = asyncio.create_task(self.run_handler(handler, event_type, event))
+                source.handler_tasks.add(task)
+                task.add_done_callback(source.handler_tasks.discard)
+
+    async def run_handler(self, handler: Callable, event_type: str, event: Any):
+        # Igual que en el cliente real, un handler que falla no corta el stream
+        try:
+            await handler(event)
+        except Exception as e:
+            logger.error(f"ERROR en handler {EVENT_CLASSES[event_type]}: {e}")
+
+    async def run_script(self):
+        source = self.source
+        await self.emit('connect', SimpleNamespace(unique_id=self.unique_id))
+
+        while self.connected and source.cursor < len(source.script):
+            step = source.script[source.cursor]
+            source.cursor += 1
+
+            delay = step.get('delay', 0) / source.speed
+            await asyncio.sleep(delay)
+
+            event_type = step.get('type')
+            if event_type == 'comment':
+                await self.emit('comment', SimpleNamespace(user=fake_user(step['user']), comment=step.get('text', '')))
+            elif event_type == 'gift':
+                await self.emit_gift(step)
+            elif event_type == 'like':
+                await self.emit('like', SimpleNamespace(user=fake_user(step['user']), count=step.get('count', 1)))
+            elif event_type == 'follow':
+                await self.emit('follow', SimpleNamespace(user=fake_user(step['user'])))
+            elif event_type == 'round':
+                if source.on_round is not None:
+                    source.on_round(step.get('phrase', ''), step.get('answer', ''), step.get('category', ''),
+                                    step.get('active', True))
+            elif event_type in ('disconnect', 'live_end'):
+                # Un disconnect dispara la reconexión del servidor, que crea un cliente nuevo
+                self.connected = False
+                await self.emit(event_type, SimpleNamespace())
+                break
+
+        if source.cursor >= len(source.script):
+            # Terminar cuando también terminaron los handlers en curso
+            while source.handler_tasks:
+                await asyncio.gather(*source.handler_tasks)
+            source.finished.set()
+
+    async def emit_gift(self, step: Dict[str, Any]):
+        """Regalo streakable: un evento por unidad y el final con repeat_end=1"""
+        user = fake_user(step['user'])
+        count = step.get('count', 1)
+        streakable = step.get('streakable', False)
+        gift = SimpleNamespace(
+            id=step.get('gift_id', 5655),
+            name=step.get('gift_name', 'Rose'),
+            info=SimpleNamespace(type=1 if streakable else 0)
+        )
+
+        if streakable:
+            interval = step.get('streak_interval', 0.05) / self.source.speed
+            for repeat in range(1, count):
+                await self.emit('gift', SimpleNamespace(user=user, gift=gift, repeat_count=repeat, repeat_end=0))
+                await asyncio.sleep(interval)
+        await self.emit('gift', SimpleNamespace(user=user, gift=gift, repeat_count=count, repeat_end=1))
+
+
+def synthetic_script(answer: str, comments: int = 1000, users: int = 200, comment_interval: float = 0.01,
+                     winner_every: int = 100, seed: int = 1) -> List[Dict[str, Any]]:
+    """Guion reproducible: comentarios con aciertos periódicos, regalos, likes y follows"""
+    rng = random.Random(seed)
+    words = ['hola', 'saludos', 'jaja', 'que', 'es', 'eso', 'no', 'se'] + answer.lower().split()
+    script: List[Dict[str, Any]] = [{'type': 'round', 'answer': answer, 'phrase': answer, 'category': 'fake'}]
+
+    for index in range(comments):
+        user = f"user{rng.randrange(users)}"
+        if winner_every and index % winner_every == winner_every - 1:
+            text = answer.lower()
+        else:
+            text = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        script.append({'type': 'comment', 'user': user, 'text': text, 'delay': comment_interval})
+
+        if index % 50 == 25:
+            script.append({'type': 'gift', 'user': user, 'gift_id': 5655, 'gift_name': 'Rose',
+                           'count': rng.randint(1, 12), 'streakable': True})
+        if index % 20 == 10:
+            script.append({'type': 'like', 'user': user, 'count': rng.randint(1, 15)})
+        if index % 200 == 100:
+            script.append({'type': 'follow', 'user': user})
+
+    script.append({'type': 'live_end'})
+    return script
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generar un guion sintético para el source falso')
+    parser.add_argument('--answer', type=str, default='gato negro', help='Respuesta de la ronda')
+    parser.add_argument('--comments', type=int, default=1000, help='Cantidad de comentarios')
+    parser.add_argument('--users', type=int, default=200, help='Usuarios distintos')
+    parser.add_argument('--interval-ms', type=float, default=10, help='Tiempo entre comentarios (ms)')
+    parser.add_argument('--winner-every', type=int, default=100, help='Un acierto cada N comentarios (0 = ninguno)')
+    parser.add_argument('--disconnect-at', type=int, default=0, help='Insertar un disconnect después del comentario N')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla del generador')
+    args = parser.parse_args()
+
+    script = synthetic_script(args.answer, args.comments, args.users, args.interval_ms / 1000, args.winner_every, args.seed)
+    if args.disconnect_at:
+        comments_seen = 0
+        for position, step in enumerate(script):
+            comments_seen += step['type'] == 'comment'
+            if comments_seen == args.disconnect_at:
+                script.insert(position + 1, {'type': 'disconnect'})
+                break
+    print(json.dumps(script, ensure_ascii=False))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Gift Triggers - Evaluación local de los triggers de regalos
+Compila la misma lista de triggers que administra Express (/gift-triggers) en
+tablas indexadas por ID y por nombre de regalo, para resolver cada regalo sin
+recorrer toda la lista. Solo las acciones resueltas se reenvían a Express.
+"""
+
+import time
+from typing import Optional, Dict, List, Any, Tuple
+
+# Triggers comunales: se procesan con likes/follows, nunca con regalos
+COMMUNAL_GIFT_IDS = ('likes', 'follows')
+
+
+class GiftTriggerEngine:
+    """Tabla de despacho compilada: gift id / nombre -> triggers ordenados por cantidad"""
+
+    def __init__(self, combo_window: float = 3.0, combo_ttl: float = 10.0):
+        # (por_id, por_nombre) se reemplaza completo en cada recarga
+        self._tables: Optional[Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]] = None
+        self.trigger_count = 0
+
+        # Combos igual que Express: mismo usuario y regalo dentro de la ventana se acumulan
+        self.combo_window = combo_window
+        self.combo_ttl = combo_ttl
+        self.recent_gifts: Dict[str, Tuple[float, int]] = {}
+        self._prune_at = 256
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._tables is not None
+
+    def load(self, triggers: List[Dict[str, Any]]):
+        """Compilar los triggers (recarga en caliente, sin reconectar)"""
+        by_id: Dict[str, List[Dict[str, Any]]] = {}
+        by_name: Dict[str, List[Dict[str, Any]]] = {}
+        count = 0
+
+        for trigger in triggers:
+            gift_id = str(trigger.get('giftId', ''))
+            if not trigger.get('enabled') or gift_id in COMMUNAL_GIFT_IDS:
+                continue
+            by_id.setdefault(gift_id, []).append(trigger)
+            gift_name = str(trigger.get('giftName', '')).lower()
+            if gift_name:
+                by_name.setdefault(gift_name, []).append(trigger)
+            count += 1
+
+        for table in (by_id, by_name):
+            for entries in table.values():
+                entries.sort(key=lambda t: t.get('quantity', 1))
+
+        self._tables = (by_id, by_name)
+        self.trigger_count = count
+
+    def combo_quantity(self, user_key: str, gift_id: Any, quantity: int) -> int:
+        """Acumular la cantidad de regalos repetidos dentro de la ventana de combo"""
+        now = time.monotonic()
+        key = f"{user_key}_{gift_id}"
+        recent = self.recent_gifts.get(key)
+
+        if recent and now - recent[0] < self.combo_window:
+            quantity += recent[1]
+        self.recent_gifts[key] = (now, quantity)
+
+        # Limpiar combos viejos solo cuando el dict duplica su tamaño (costo amortizado)
+        if len(self.recent_gifts) > self._prune_at:
+            self.recent_gifts = {
+                k: v for k, v in self.recent_gifts.items() if now - v[0] <= self.combo_ttl
+            }
+            self._prune_at = max(256, 2 * len(self.recent_gifts))
+        return quantity
+
+    def evaluate(self, gift_id: Any, gift_name: str, quantity: int) -> List[Dict[str, Any]]:
+        """Triggers que activa un regalo (por ID o por nombre) con la cantidad dada"""
+        tables = self._tables
+        if tables is None:
+            return []
+        by_id, by_name = tables
+
+        matched: Dict[str, Dict[str, Any]] = {}
+        for entries in (by_id.get(str(gift_id), ()), by_name.get((gift_name or '').lower(), ())):
+            for trigger in entries:
+                if quantity < trigger.get('quantity', 1):
+                    break
+                matched.setdefault(str(trigger.get('id')), trigger)
+        return list(matched.values())
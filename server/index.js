@@ -34,6 +34,9 @@ if (isProduction) {
   app.use(express.static(path.join(__dirname, 'public')));
 }
 
+// Fotos de perfil descargadas por el servidor Python (cache local de avatares)
+app.use('/avatars', express.static(path.join(__dirname, 'avatar_cache'), { maxAge: '1d' }));
+
 app.post('/login', async (req, res) => {
   try {
     // Aquí puedes agregar la lógica para manejar el inicio de sesión
@@ -282,7 +285,9 @@ let tiktokLiveStatus = {
   communalCounters: {
     likes: 0,
     follows: 0
-  }
+  },
+  // Comentarios más cercanos a la respuesta en la ronda actual (publicados por Python)
+  closestGuesses: []
 };
 
 // Variable global para almacenar los triggers de regalos configurados (7 triggers: 5 originales + 2 comunales extra)
@@ -494,6 +499,11 @@ async function processGiftTriggers(giftData) {
     return;
   }
 
+  await executeGiftTriggers(matchingTriggers, { username, unique_id, quantity });
+}
+
+// Función para ejecutar triggers ya resueltos (por processGiftTriggers o por el servidor Python)
+async function executeGiftTriggers(matchingTriggers, { username, unique_id, quantity }) {
   // Verificar si ya se ejecutó este trigger recientemente para evitar spam
   const executedTriggers = new Set();
 
@@ -631,9 +641,11 @@ async function processGiftTriggers(giftData) {
 
 // Endpoint para recibir eventos del servidor Python TikTok Live
 app.post('/tiktok-live-event', (req, res) => {
-  const { event, data, timestamp } = req.body;
-  
-  console.log(`📺 [TikTok Live] Event: ${event}`, data);
+  const receivedAt = Date.now();
+  const { event, data, timestamp, room, trace } = req.body;
+
+  // 'room' solo viene en modo supervisor (varios streams multiplexados)
+  console.log(`📺 [TikTok Live] Event: ${event}${room ? ` (sala @${room})` : ''}`, data);
   
   // Actualizar estado según el evento
   switch (event) {
@@ -652,12 +664,28 @@ app.post('/tiktok-live-event', (req, res) => {
 
     case 'gift':
       console.log(`🎁 [REGALO] ${data.username} envió ${data.quantity}x ${data.gift_name} (ID: ${data.gift_id})`);
+      // Si Python ya resolvió los triggers, el regalo crudo es solo informativo
+      if (data.triggers_resolved) {
+        break;
+      }
       // Procesar triggers de regalos de forma asíncrona
       processGiftTriggers(data).catch(error => {
         console.error('❌ [GIFT TRIGGER] Error procesando triggers:', error);
       });
       break;
 
+    case 'gift_trigger': {
+      // Triggers resueltos en Python: usar la configuración actual por id
+      const resolvedTriggers = (data.trigger_ids || [])
+        .map(id => giftTriggers.find(trigger => trigger.id.toString() === id.toString()))
+        .filter(trigger => trigger && trigger.enabled);
+      console.log(`🎯 [GIFT TRIGGER] ${data.username} activó ${resolvedTriggers.length} trigger(s) con ${data.quantity}x ${data.gift_name}`);
+      executeGiftTriggers(resolvedTriggers, data).catch(error => {
+        console.error('❌ [GIFT TRIGGER] Error ejecutando triggers resueltos:', error);
+      });
+      break;
+    }
+
     case 'like':
       console.log(`❤️ [LIKE] ${data.username} dio ${data.count || 1} like(s)`);
       // Procesar likes comunales
@@ -674,6 +702,10 @@ app.post('/tiktok-live-event', (req, res) => {
       });
       break;
 
+    case 'closest_guesses':
+      tiktokLiveStatus.closestGuesses = data.guesses || [];
+      break;
+
     case 'winner':
       console.log(`🎉 [GANADOR] ${data.username} respondió: "${data.comment}"`);
 
@@ -696,7 +728,11 @@ app.post('/tiktok-live-event', (req, res) => {
       tiktokLiveStatus.lastWinner = {
         username: data.username,
         unique_id: data.unique_id,
-        profile_picture: data.profile_picture,
+        // Preferir el avatar ya descargado por Python: se sirve al instante desde /avatars
+        profile_picture: data.profile_picture_local
+          ? `${req.protocol}://${req.get('host')}${data.profile_picture_local}`
+          : data.profile_picture,
+        profile_picture_remote: data.profile_picture,
         comment: data.comment,
         answer: data.answer,
         phrase: data.phrase,
@@ -711,7 +747,12 @@ app.post('/tiktok-live-event', (req, res) => {
       break;
   }
   
-  res.json({ success: true, message: 'Evento procesado' });
+  // Devolver los tiempos de Express para completar la traza del evento en Python
+  res.json({
+    success: true,
+    message: 'Evento procesado',
+    trace: trace ? { id: trace.id, express_received_ms: receivedAt, express_handled_ms: Date.now() } : undefined
+  });
 });
 
 // ===============================
@@ -731,6 +772,7 @@ app.post('/gift-triggers', (req, res) => {
   }
 
   giftTriggers = triggers;
+  tiktokLiveManager.updateGiftTriggers(giftTriggers);
   console.log(`🎁 [GIFT TRIGGERS] Configuración actualizada: ${triggers.length} triggers`);
   res.json({ success: true, message: 'Triggers actualizados', triggers: giftTriggers });
 });
@@ -870,6 +912,7 @@ app.post('/tiktok-live-start', async (req, res) => {
     const result = await tiktokLiveManager.connectToUser(username);
     
     if (result.success) {
+      tiktokLiveManager.updateGiftTriggers(giftTriggers);
       res.json({ 
         success: true, 
         message: `Conexión iniciada a @${username}`,
@@ -884,6 +927,36 @@ app.post('/tiktok-live-start', async (req, res) => {
   }
 });
 
+// Endpoint para obtener el estado interno del servidor Python (incluye tiempos de rondas)
+app.get('/tiktok-live-python-status', async (req, res) => {
+  try {
+    await tiktokLiveManager.requestPythonStatus();
+    res.json({ success: true, status: tiktokLiveManager.getStatus() });
+  } catch (error) {
+    res.status(503).json({ success: false, error: error.message });
+  }
+});
+
+// Endpoint para buscar en los comentarios del stream ("¿quién dijo X?")
+app.get('/tiktok-live-transcript', async (req, res) => {
+  const { q, limit, since, until, room } = req.query;
+  if (!q) {
+    return res.status(400).json({ success: false, message: 'q es requerido' });
+  }
+
+  try {
+    const result = await tiktokLiveManager.searchTranscript(q, {
+      limit: limit ? parseInt(limit, 10) : undefined,
+      since: since ? parseFloat(since) : undefined,
+      until: until ? parseFloat(until) : undefined,
+      room: room || undefined // Solo en modo supervisor (--rooms)
+    });
+    res.json({ success: true, ...result });
+  } catch (error) {
+    res.status(503).json({ success: false, error: error.message });
+  }
+});
+
 // Endpoint para detener servidor Python TikTok Live
 app.post('/tiktok-live-stop', async (req, res) => {
   try {
@@ -995,6 +1068,7 @@ app.post('/update-gift-triggers', (req, res) => {
 
   // Actualizar triggers globales
   giftTriggers = triggers;
+  tiktokLiveManager.updateGiftTriggers(giftTriggers);
   console.log('✅ [GIFT TRIGGERS] Actualizados desde frontend:', triggers.length, 'triggers');
   console.log('🔍 [GIFT TRIGGERS] Triggers activos:');
   giftTriggers.forEach(trigger => {
@@ -1493,6 +1567,7 @@ app.listen(PORT, async () => {
     try {
       const result = await tiktokLiveManager.startStandby(); // Inicia en modo espera
       if (result.success) {
+        tiktokLiveManager.updateGiftTriggers(giftTriggers);
         console.log('✅ [TikTok Live] Servidor Python iniciado en modo espera');
         console.log('📺 Para conectar al live, ve al Panel Admin y configura tu usuario TikTok');
       } else {
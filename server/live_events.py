@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Live Events - Modelo tipado de los eventos enviados al servidor Express
+Cada evento es una clase compacta con __slots__ y se serializa directo a bytes
+con un encoder precompilado (orjson si está instalado, json de stdlib si no).
+"""
+
+import json
+from typing import Optional, Any, Dict, List, Tuple
+
+# orjson es opcional: mucho más rápido y devuelve bytes directamente
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_encode = json.JSONEncoder(
+    ensure_ascii=False,
+    separators=(',', ':'),
+    check_circular=False
+).encode
+
+
+class LiveEventRecord:
+    """Base de los eventos: el nombre del evento y los campos definidos en __slots__"""
+    __slots__ = ()
+    event_type = ''
+    fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Campos de toda la jerarquía (LiveEndRecord hereda los de DisconnectRecord)
+        cls.fields = cls.fields + tuple(cls.__dict__.get('__slots__', ()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.fields}
+
+
+class ConnectRecord(LiveEventRecord):
+    __slots__ = ('username', 'room_id', 'connected')
+    event_type = 'connect'
+
+    def __init__(self, username: str, room_id: Any):
+        self.username = username
+        self.room_id = room_id
+        self.connected = True
+
+
+class WinnerRecord(LiveEventRecord):
+    __slots__ = ('username', 'unique_id', 'profile_picture', 'comment', 'answer', 'phrase', 'category',
+                 'profile_picture_local')
+    event_type = 'winner'
+
+    def __init__(self, username: str, unique_id: str, profile_picture: Optional[str], comment: str,
+                 answer: Optional[str], phrase: Optional[str], category: Optional[str],
+                 profile_picture_local: Optional[str] = None):
+        self.username = username
+        self.unique_id = unique_id
+        self.profile_picture = profile_picture
+        self.comment = comment
+        self.answer = answer
+        self.phrase = phrase
+        self.category = category
+        self.profile_picture_local = profile_picture_local
+
+
+class GiftRecord(LiveEventRecord):
+    __slots__ = ('username', 'unique_id', 'gift_name', 'gift_id', 'quantity', 'triggers_resolved')
+    event_type = 'gift'
+
+    def __init__(self, username: str, unique_id: str, gift_name: str, gift_id: Any, quantity: int,
+                 triggers_resolved: bool = False):
+        self.username = username
+        self.unique_id = unique_id
+        self.gift_name = gift_name
+        self.gift_id = gift_id
+        self.quantity = quantity
+        self.triggers_resolved = triggers_resolved
+
+
+class GiftTriggerRecord(LiveEventRecord):
+    __slots__ = ('username', 'unique_id', 'gift_name', 'gift_id', 'quantity', 'trigger_ids')
+    event_type = 'gift_trigger'
+
+    def __init__(self, username: str, unique_id: str, gift_name: str, gift_id: Any, quantity: int,
+                 trigger_ids: List[str]):
+        self.username = username
+        self.unique_id = unique_id
+        self.gift_name = gift_name
+        self.gift_id = gift_id
+        self.quantity = quantity
+        self.trigger_ids = trigger_ids
+
+
+class LikeRecord(LiveEventRecord):
+    __slots__ = ('username', 'unique_id', 'count')
+    event_type = 'like'
+
+    def __init__(self, username: str, unique_id: str, count: int):
+        self.username = username
+        self.unique_id = unique_id
+        self.count = count
+
+
+class FollowRecord(LiveEventRecord):
+    __slots__ = ('username', 'unique_id')
+    event_type = 'follow'
+
+    def __init__(self, username: str, unique_id: str):
+        self.username = username
+        self.unique_id = unique_id
+
+
+class DisconnectRecord(LiveEventRecord):
+    __slots__ = ('connected', 'reason')
+    event_type = 'disconnect'
+
+    def __init__(self, reason: str = 'disconnect_event'):
+        self.connected = False
+        self.reason = reason
+
+
+class LiveEndRecord(DisconnectRecord):
+    __slots__ = ()
+    event_type = 'live_end'
+
+    def __init__(self, reason: str = 'live_ended'):
+        super().__init__(reason)
+
+
+class ClosestGuessesRecord(LiveEventRecord):
+    __slots__ = ('guesses', 'category')
+    event_type = 'closest_guesses'
+
+    def __init__(self, guesses: List[Dict[str, Any]], category: Optional[str]):
+        self.guesses = guesses
+        self.category = category
+
+
+def encode_event(record: LiveEventRecord, timestamp: int, room: Optional[str] = None,
+                 trace: Optional[Dict[str, Any]] = None) -> bytes:
+    """Serializar un evento al payload de /tiktok-live-event como bytes UTF-8"""
+    payload = {
+        'event': record.event_type,
+        'data': record.to_dict(),
+        'timestamp': timestamp
+    }
+    if room is not None:
+        payload['room'] = room
+    if trace is not None:
+        payload['trace'] = trace
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return _json_encode(payload).encode('utf-8')
+
+
+if __name__ == '__main__':
+    # Micro-benchmark: dict ad-hoc + json.dumps vs evento tipado + encode_event
+    # (con --stdlib se mide el encoder de stdlib aunque orjson esté instalado)
+    import sys
+    import time
+    import tracemalloc
+
+    iterations = 100000
+    if '--stdlib' in sys.argv:
+        orjson = None
+
+    def legacy():
+        data = {
+            'username': 'Usuario', 'unique_id': 'usuario123', 'gift_name': 'Rose',
+            'gift_id': 5655, 'quantity': 10
+        }
+        return json.dumps({'event': 'gift', 'data': data, 'timestamp': 1700000000}).encode('utf-8')
+
+    def typed():
+        return encode_event(GiftRecord('Usuario', 'usuario123', 'Rose', 5655, 10), 1700000000)
+
+    for name, func in (('dict + json.dumps', legacy), ('record + encode_event', typed)):
+        # Mejor de 5 rondas para reducir el ruido de la máquina
+        elapsed = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            elapsed = min(elapsed, time.perf_counter() - start)
+
+        tracemalloc.start()
+        for _ in range(1000):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{name:24s} [{'orjson' if orjson is not None and func is typed else 'stdlib'}] {elapsed / iterations * 1e6:7.2f} us/evento  pico {peak} bytes / 1000 eventos")
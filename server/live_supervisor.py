@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Live Supervisor - Modo multi-proceso para muchos streams simultáneos
+Reparte las salas (usuarios de TikTok) entre un pool de procesos worker, uno por
+núcleo. Los workers envían sus eventos al supervisor por un socket local con
+frames binarios; el supervisor los reenvía a Express con un pool de envíos
+concurrentes y le confirma a cada worker lo que respondió Express.
+
+Protocolo de frames: 1 byte de tipo + 4 bytes de longitud (big-endian) + cuerpo
+  b'E' número de secuencia (4 bytes) + evento ya serializado para /tiktok-live-event
+  b'A' confirmación hacia el worker: secuencia (4 bytes) + 1 byte (1 = Express respondió 200)
+  b'C' mensaje de control en JSON (hello del worker, game state hacia el worker)
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Optional, Dict, List, Any
+
+import aiohttp
+
+from transcript_index import MAX_TRANSCRIPT_RESULTS
+
+FRAME_HEADER = struct.Struct('>cI')
+FRAME_EVENT = b'E'
+FRAME_ACK = b'A'
+FRAME_CONTROL = b'C'
+EVENT_SEQ = struct.Struct('>I')
+ACK_BODY = struct.Struct('>I?')
+
+# Cada sala de un worker se revisa cada ROOM_CHECK_INTERVAL segundos; si no está
+# en vivo se reintenta con backoff hasta ROOM_RETRY_MAX_DELAY segundos
+ROOM_CHECK_INTERVAL = 5
+ROOM_RETRY_MAX_DELAY = 300
+
+logger = logging.getLogger('TikTokLiveSupervisor')
+
+
+def pack_frame(frame_type: bytes, body: bytes) -> bytes:
+    return FRAME_HEADER.pack(frame_type, len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader):
+    """Leer un frame completo del socket (tipo, cuerpo)"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    frame_type, length = FRAME_HEADER.unpack(header)
+    body = await reader.readexactly(length)
+    return frame_type, body
+
+
+def shard_rooms(rooms: List[str], workers: int) -> List[List[str]]:
+    """Repartir las salas entre los workers (round-robin)"""
+    shards = [[] for _ in range(max(1, min(workers, len(rooms))))]
+    for index, room in enumerate(rooms):
+        shards[index % len(shards)].append(room)
+    return shards
+
+
+class LiveSupervisor:
+    def __init__(self, rooms: List[str], workers: Optional[int] = None):
+        self.express_server_url = "http://localhost:3002"
+        self.shards = shard_rooms(rooms, workers or os.cpu_count() or 1)
+        self.processes: Dict[int, asyncio.subprocess.Process] = {}
+        self.writers: Dict[int, asyncio.StreamWriter] = {}
+        self.restarts: Dict[int, int] = {index: 0 for index in range(len(self.shards))}
+        self.max_restart_delay = 30
+        # Un worker que corrió al menos esto sin caerse vuelve a empezar el backoff
+        self.stable_after = 60
+        self.port: Optional[int] = None
+        self.running = True
+
+        # Último game state por sala (None = todas), para reenviarlo a workers reiniciados
+        self.game_states: Dict[Optional[str], Dict[str, Any]] = {}
+        self.gift_triggers_message: Optional[Dict[str, Any]] = None
+
+        # Eventos pendientes de enviar: (writer del worker, secuencia, cuerpo)
+        self.event_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        # Envíos concurrentes a Express: una respuesta lenta no frena a las demás salas
+        self.sender_count = 8
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Búsquedas de transcript repartidas entre workers: search_id -> respuestas pendientes
+        self.search_ids = itertools.count(1)
+        self.pending_searches: Dict[int, Dict[str, Any]] = {}
+        self.search_timeout = 1.5
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self.handle_worker, '127.0.0.1', 0)
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info(f"SUPERVISOR escuchando en 127.0.0.1:{self.port} - {len(self.shards)} workers")
+
+        self.start_stdin_listener()
+        tasks = [asyncio.create_task(self.forward_events())]
+        for index in range(len(self.shards)):
+            tasks.append(asyncio.create_task(self.keep_worker_alive(index)))
+
+        async with server:
+            await asyncio.gather(*tasks)
+
+    async def keep_worker_alive(self, index: int):
+        """Lanzar el worker y reiniciarlo con las mismas salas si se cae"""
+        while self.running:
+            rooms = self.shards[index]
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, __file__,
+                '--worker-id', str(index),
+                '--workers', str(len(self.shards)),
+                '--port', str(self.port),
+                '--rooms', ','.join(rooms),
+                stdin=asyncio.subprocess.DEVNULL
+            )
+            self.processes[index] = process
+            logger.info(f"WORKER {index} iniciado (pid {process.pid}) con salas: {rooms}")
+            started = time.monotonic()
+
+            code = await process.wait()
+            self.writers.pop(index, None)
+            if not self.running:
+                break
+
+            if time.monotonic() - started >= self.stable_after:
+                self.restarts[index] = 0
+            self.restarts[index] += 1
+            delay = min(self.max_restart_delay, self.restarts[index])
+            logger.warning(f"WORKER {index} terminó con código {code} - reinicio {self.restarts[index]} en {delay}s")
+            await asyncio.sleep(delay)
+
+    async def handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Recibir frames de un worker"""
+        index = None
+        try:
+            while True:
+                frame_type, body = await read_frame(reader)
+                if frame_type == FRAME_EVENT:
+                    seq, = EVENT_SEQ.unpack_from(body)
+                    try:
+                        self.event_queue.put_nowait((writer, seq, body[EVENT_SEQ.size:]))
+                    except asyncio.QueueFull:
+                        logger.warning("COLA de eventos llena - evento descartado")
+                        self.send_ack(writer, seq, False)
+                elif frame_type == FRAME_CONTROL:
+                    message = json.loads(body)
+                    if message.get('action') == 'hello':
+                        index = message['worker_id']
+                        self.writers[index] = writer
+                        logger.info(f"WORKER {index} conectado al supervisor")
+                        replay = list(self.game_states.values())
+                        if self.gift_triggers_message is not None:
+                            replay.append(self.gift_triggers_message)
+                        for state in replay:
+                            writer.write(pack_frame(FRAME_CONTROL, json.dumps(state).encode('utf-8')))
+                        await writer.drain()
+                    elif message.get('action') == 'transcript_result':
+                        self.collect_search_reply(message)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            if index is not None and self.writers.get(index) is writer:
+                self.writers.pop(index, None)
+            writer.close()
+
+    async def forward_events(self):
+        """Reenviar a Express los eventos de todos los workers con un pool de envíos concurrentes"""
+        connector = aiohttp.TCPConnector(limit=self.sender_count)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(self.send_events(session) for _ in range(self.sender_count)))
+
+    async def send_events(self, session: aiohttp.ClientSession):
+        """Un sender del pool: toma eventos de la cola y confirma al worker lo que respondió Express"""
+        while True:
+            writer, seq, body = await self.event_queue.get()
+            ok = False
+            try:
+                async with session.post(
+                    f"{self.express_server_url}/tiktok-live-event",
+                    data=body,
+                    headers={'Content-Type': 'application/json'},
+                    timeout=aiohttp.ClientTimeout(total=5)
+                ) as response:
+                    await response.read()
+                    ok = response.status == 200
+                    if not ok:
+                        logger.warning(f"ERROR enviando evento: {response.status}")
+            except Exception as e:
+                logger.error(f"ERROR notificando servidor: {e}")
+            self.send_ack(writer, seq, ok)
+
+    def send_ack(self, writer: asyncio.StreamWriter, seq: int, ok: bool):
+        # Frame de 10 bytes: se escribe sin drain, el worker lo lee de inmediato
+        if not writer.is_closing():
+            writer.write(pack_frame(FRAME_ACK, ACK_BODY.pack(seq, ok)))
+
+    def start_stdin_listener(self):
+        """Leer mensajes de Node por stdin y enviarlos a los workers"""
+        def stdin_listener():
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    asyncio.run_coroutine_threadsafe(self.dispatch_control(line), self.loop)
+
+        threading.Thread(target=stdin_listener, daemon=True).start()
+
+    async def dispatch_control(self, line: str):
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"MENSAJE STDIN invalido (no JSON): {line}")
+            return
+
+        if message.get('action') == 'get_status':
+            reply = dict(self.get_status(), request_id=message.get('request_id'))
+            print(f"STATUS {json.dumps(reply, ensure_ascii=False)}", flush=True)
+            return
+
+        if message.get('action') == 'search_transcript':
+            await self.search_transcript(message)
+            return
+
+        # 'room' opcional: si falta, el mensaje aplica a todas las salas
+        room = message.get('room')
+        if message.get('action') == 'update_game_state':
+            if room is None:
+                self.game_states.clear()
+            self.game_states[room] = message
+        elif message.get('action') == 'update_gift_triggers':
+            self.gift_triggers_message = message
+
+        frame = pack_frame(FRAME_CONTROL, json.dumps(message).encode('utf-8'))
+        for index, writer in list(self.writers.items()):
+            if room is None or room in self.shards[index]:
+                writer.write(frame)
+                await writer.drain()
+
+    async def search_transcript(self, message: Dict[str, Any]):
+        """Buscar en los workers de las salas pedidas y responder a Node con una sola línea"""
+        search = message.get('data', {})
+        room = search.get('room')  # Sin sala: buscar en todas y unir los resultados
+        limit = min(int(search.get('limit') or 50), MAX_TRANSCRIPT_RESULTS)
+        targets = {index: writer for index, writer in self.writers.items()
+                   if room is None or room in self.shards[index]}
+
+        search_id = next(self.search_ids)
+        pending = {'waiting': set(targets), 'results': [], 'done': asyncio.Event()}
+        self.pending_searches[search_id] = pending
+
+        frame = pack_frame(FRAME_CONTROL, json.dumps({
+            'action': 'search_transcript', 'search_id': search_id, 'room': room, 'data': search
+        }).encode('utf-8'))
+        for writer in targets.values():
+            writer.write(frame)
+            await writer.drain()
+
+        if targets:
+            try:
+                await asyncio.wait_for(pending['done'].wait(), self.search_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"BUSQUEDA {search_id}: sin respuesta de workers {sorted(pending['waiting'])}")
+        self.pending_searches.pop(search_id, None)
+
+        # Unir los resultados de todas las salas, más recientes primero
+        results = sorted(pending['results'], key=lambda result: result['timestamp'], reverse=True)[:limit]
+        reply = {
+            'request_id': message.get('request_id'),
+            'query': search.get('query', ''),
+            'results': results,
+            'missing_workers': sorted(pending['waiting'])
+        }
+        print(f"TRANSCRIPT {json.dumps(reply, ensure_ascii=False)}", flush=True)
+
+    def collect_search_reply(self, message: Dict[str, Any]):
+        pending = self.pending_searches.get(message.get('search_id'))
+        if pending is None:
+            return  # Respuesta tardía de una búsqueda que ya venció
+        pending['results'].extend(message.get('results', []))
+        pending['waiting'].discard(message.get('worker_id'))
+        if not pending['waiting']:
+            pending['done'].set()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'mode': 'supervisor',
+            'workers': [
+                {
+                    'worker_id': index,
+                    'rooms': rooms,
+                    'pid': self.processes[index].pid if index in self.processes else None,
+                    'connected': index in self.writers,
+                    'restarts': self.restarts[index]
+                }
+                for index, rooms in enumerate(self.shards)
+            ],
+            'queued_events': self.event_queue.qsize()
+        }
+
+
+async def watch_room(room: str, server, max_delay: float = ROOM_RETRY_MAX_DELAY):
+    """Mantener conectada una sala: reintentar con backoff exponencial mientras no
+    esté en vivo, y volver a conectar cuando se cae o termina el live"""
+    # El worker es el único que reintenta: sin esto on_disconnect también reconectaría
+    server.max_reconnect_attempts = 0
+    failures = 0
+    while True:
+        if server.is_connected:
+            await asyncio.sleep(ROOM_CHECK_INTERVAL)
+            continue
+
+        # Con el cliente real connect_to_live vuelve recién cuando termina la conexión
+        result = await server.connect_to_live(room)
+        if result.get('success'):
+            failures = 0
+            delay = server.reconnect_base_delay
+        else:
+            failures += 1
+            delay = min(max_delay, server.reconnect_base_delay * 2 ** (failures - 1))
+            logger.warning(f"SALA @{room}: {result.get('error')} - reintento {failures} en {delay}s")
+        await asyncio.sleep(delay)
+
+
+async def run_worker(worker_id: int, port: int, rooms: List[str], workers: int = 1):
+    """Proceso worker: un TikTokLiveServer por sala, eventos hacia el supervisor"""
+    from pathlib import Path
+    from avatar_cache import AvatarCache
+    from tiktok_live_simple import TikTokLiveServer
+
+    # Una cache de avatares por worker, en su propio directorio y con su parte del límite
+    # total: los procesos no se pisan la cuenta de tamaño ni se borran archivos entre sí
+    worker_dir = f"worker-{worker_id}"
+    avatar_cache = AvatarCache.shared(
+        Path(__file__).parent / "avatar_cache" / worker_dir,
+        url_prefix=f"/avatars/{worker_dir}",
+        max_bytes=50 * 1024 * 1024 // max(1, workers)
+    )
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    write_lock = asyncio.Lock()
+    loop = asyncio.get_running_loop()
+    sequence = itertools.count(1)
+    pending_acks: Dict[int, asyncio.Future] = {}
+
+    async def send_event(body: bytes) -> bool:
+        """Enviar un evento y esperar la confirmación del supervisor (True = Express respondió 200)"""
+        seq = next(sequence) & 0xffffffff
+        ack = pending_acks[seq] = loop.create_future()
+        try:
+            async with write_lock:
+                writer.write(pack_frame(FRAME_EVENT, EVENT_SEQ.pack(seq) + body))
+                await writer.drain()
+            return await asyncio.wait_for(ack, timeout=10)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            pending_acks.pop(seq, None)
+
+    servers = {room: TikTokLiveServer(event_sink=send_event, avatar_cache=avatar_cache) for room in rooms}
+
+    writer.write(pack_frame(FRAME_CONTROL, json.dumps({'action': 'hello', 'worker_id': worker_id}).encode('utf-8')))
+    await writer.drain()
+
+    async def read_control():
+        while True:
+            frame_type, body = await read_frame(reader)
+            if frame_type == FRAME_ACK:
+                seq, ok = ACK_BODY.unpack(body)
+                ack = pending_acks.get(seq)
+                if ack is not None and not ack.done():
+                    ack.set_result(ok)
+                continue
+            if frame_type != FRAME_CONTROL:
+                continue
+            message = json.loads(body)
+            room = message.get('room')
+
+            if message.get('action') == 'search_transcript':
+                # Responder al supervisor por el socket (no por stdout): él une las salas
+                results = []
+                for name, server in servers.items():
+                    if room is None or room == name:
+                        for result in server.search_transcript(message.get('data', {}))['results']:
+                            result['room'] = name
+                            results.append(result)
+                reply = {'action': 'transcript_result', 'search_id': message.get('search_id'),
+                         'worker_id': worker_id, 'results': results}
+                async with write_lock:
+                    writer.write(pack_frame(FRAME_CONTROL, json.dumps(reply, ensure_ascii=False).encode('utf-8')))
+                    await writer.drain()
+                continue
+
+            for name, server in servers.items():
+                if room is None or room == name:
+                    server.process_stdin_message(body.decode('utf-8'))
+
+    # read_control solo termina si el supervisor cierra el socket: el worker sale con él
+    watchers = [watch_room(room, server) for room, server in servers.items()]
+    try:
+        await asyncio.gather(read_control(), *watchers)
+    finally:
+        await avatar_cache.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='TikTok Live Supervisor')
+    parser.add_argument('--rooms', type=str, required=True, help='Usuarios de TikTok separados por comas')
+    parser.add_argument('--workers', type=int, default=None, help='Número de procesos worker (por defecto: núcleos de CPU)')
+    parser.add_argument('--worker-id', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    rooms = [room.replace('@', '').strip() for room in args.rooms.split(',') if room.strip()]
+
+    if args.worker_id is not None:
+        asyncio.run(run_worker(args.worker_id, args.port, rooms, args.workers or 1))
+    else:
+        asyncio.run(LiveSupervisor(rooms, args.workers).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Round Stats - Tiempos de cada ronda del juego
+Registra cuándo se activa cada ronda, cuánto tarda el primer acierto, el ritmo
+de aciertos posteriores y la latencia hasta que Express confirma el ganador.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Any
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil simple (nearest-rank) de una lista de valores"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+@dataclass
+class RoundTiming:
+    answer: Optional[str]
+    activated_at: float
+    activated_wall: float
+    ended_at: Optional[float] = None
+    first_correct_at: Optional[float] = None
+    last_correct_at: Optional[float] = None
+    correct_count: int = 0
+    express_latencies: List[float] = field(default_factory=list)
+
+    def time_to_first_correct(self) -> Optional[float]:
+        if self.first_correct_at is None:
+            return None
+        return self.first_correct_at - self.activated_at
+
+    def correct_per_second(self) -> Optional[float]:
+        """Aciertos por segundo después del primero"""
+        if self.first_correct_at is None or self.correct_count < 2:
+            return None
+        window = self.last_correct_at - self.first_correct_at
+        if window <= 0:
+            return None
+        return (self.correct_count - 1) / window
+
+    def summary(self) -> Dict[str, Any]:
+        ttf = self.time_to_first_correct()
+        rate = self.correct_per_second()
+        end = self.ended_at if self.ended_at is not None else time.monotonic()
+        return {
+            'answer': self.answer,
+            'activated_at': int(self.activated_wall),
+            'duration_s': round(end - self.activated_at, 3),
+            'time_to_first_correct_s': round(ttf, 3) if ttf is not None else None,
+            'correct_count': self.correct_count,
+            'correct_per_second': round(rate, 3) if rate is not None else None,
+            'express_latency_ms': [round(l * 1000, 1) for l in self.express_latencies]
+        }
+
+
+class RoundStats:
+    """Ring buffer de las rondas recientes y la ronda en curso"""
+
+    def __init__(self, max_rounds: int = 20):
+        self.current: Optional[RoundTiming] = None
+        self.recent: deque = deque(maxlen=max_rounds)
+        self.lock = threading.Lock()
+
+    def start_round(self, answer: Optional[str]):
+        """Registrar la activación de una ronda (cierra la anterior si seguía abierta)"""
+        with self.lock:
+            if self.current is not None and self.current.answer == answer and self.current.ended_at is None:
+                return
+            self._close_current()
+            self.current = RoundTiming(answer=answer, activated_at=time.monotonic(), activated_wall=time.time())
+
+    def end_round(self):
+        with self.lock:
+            self._close_current()
+
+    def _close_current(self):
+        if self.current is not None:
+            self.current.ended_at = time.monotonic()
+            self.recent.append(self.current)
+            self.current = None
+
+    def record_correct(self, hit_at: float):
+        """Registrar un comentario correcto (hit_at en time.monotonic())"""
+        with self.lock:
+            if self.current is None:
+                return
+            if self.current.first_correct_at is None:
+                self.current.first_correct_at = hit_at
+            self.current.last_correct_at = hit_at
+            self.current.correct_count += 1
+
+    def record_express_ack(self, latency: float):
+        """Registrar la demora entre el acierto y la confirmación de Express (segundos)"""
+        with self.lock:
+            if self.current is not None:
+                self.current.express_latencies.append(latency)
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            rounds = list(self.recent)
+            current = self.current.summary() if self.current else None
+
+        ttfs = [r.time_to_first_correct() for r in rounds if r.first_correct_at is not None]
+        latencies = [l for r in rounds for l in r.express_latencies]
+
+        return {
+            'current_round': current,
+            'recent_rounds': [r.summary() for r in rounds],
+            'time_to_first_correct_s': {
+                'p50': round(percentile(ttfs, 50), 3) if ttfs else None,
+                'p95': round(percentile(ttfs, 95), 3) if ttfs else None
+            },
+            'express_latency_ms': {
+                'p50': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+                'p95': round(percentile(latencies, 95) * 1000, 1) if latencies else None
+            }
+        }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Soak Test - Simula horas de tráfico de un live contra TikTokLiveServer
+Genera comentarios, regalos, likes, follows y cambios de ronda lo más rápido
+posible, toma snapshots de tracemalloc cada cierto tiempo simulado y reporta
+los sitios de asignación que más crecen. Termina con código 1 si la memoria
+residente (medida en cada intervalo y al final) supera el límite configurado, o si
+el crecimiento de tracemalloc desde el baseline supera --growth-limit-mb.
+
+Uso:
+    python soak_test.py --hours 8 --comments-per-minute 1000 --rss-limit-mb 300
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+from tiktok_live_simple import TikTokLiveServer
+
+ANSWERS = [
+    ('GATO NEGRO', 'ANIMALES'), ('TORRE EIFFEL', 'LUGARES'), ('CIEN AÑOS DE SOLEDAD', 'LIBROS'),
+    ('PIZZA', 'COMIDA'), ('EL REY LEON', 'PELICULAS'), ('FUTBOL', 'DEPORTES')
+]
+WORDS = ['hola', 'gato', 'perro', 'torre', 'pizza', 'rey', 'leon', 'negro', 'jaja', 'saludos', 'que', 'es', 'eso']
+GIFTS = [(5655, 'Rose', 1), (5658, 'Perfume', 1), (5879, 'Love Bang', 0), (5269, 'TikTok', 0), (5869, 'Galaxy', 0)]
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Memoria residente actual del proceso en MB (None si no se puede medir)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        import resource
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ImportError):
+        return None
+
+
+class SoakTest:
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.events_sent = 0
+        self.winners = 0
+        self.peak_rss = 0.0
+        self.growth_bytes = 0
+
+        self.server = TikTokLiveServer(event_sink=self.discard_event)
+        self.server.game_state.streamer_username = 'soak_test'
+        self.server.comment_batch_size = args.batch_comments
+        self.server.gift_triggers.load([
+            {'id': str(index), 'giftId': gift_id, 'giftName': name, 'quantity': 5, 'action': 'purchase_hint', 'enabled': True}
+            for index, (gift_id, name, _) in enumerate(GIFTS)
+        ])
+        logging.getLogger('TikTokLive').setLevel(logging.WARNING)
+
+    async def discard_event(self, body: bytes) -> bool:
+        self.events_sent += 1
+        if body.startswith(b'{"event":"winner"'):
+            self.winners += 1
+        return True
+
+    def user(self):
+        index = self.random.randrange(self.args.users)
+        return f"Usuario {index}", f"user{index}"
+
+    def comment_text(self, answer: str) -> str:
+        if self.random.random() < 0.02:
+            return answer.lower()
+        return ' '.join(self.random.choice(WORDS) for _ in range(self.random.randint(1, 6)))
+
+    async def run(self) -> int:
+        args = self.args
+        total_seconds = int(args.hours * 3600)
+        round_seconds = 3600 / args.rounds_per_hour
+        snapshot_seconds = args.snapshot_minutes * 60
+
+        warmup_seconds = args.warmup_minutes * 60
+        if warmup_seconds >= total_seconds:
+            # Corrida más corta que el warmup: el baseline se toma a mitad de camino
+            warmup_seconds = total_seconds // 2
+            print(f"AVISO: warmup mayor que la corrida, baseline a los {warmup_seconds / 60:.1f} minutos")
+
+        tracemalloc.start(args.trace_depth)
+        baseline = None
+        previous = None
+        self.peak_rss = 0.0
+        started = time.perf_counter()
+        answer, category = ANSWERS[0]
+
+        for second in range(total_seconds):
+            # Cambio de ronda: 80% del tiempo activa, 20% entre rondas
+            position = second % round_seconds
+            if position < 1:
+                answer, category = self.random.choice(ANSWERS)
+                self.server.update_game_state(f"Frase de {category}", answer, category, True)
+            elif int(position) == int(round_seconds * 0.8):
+                self.server.update_game_state('', '', '', False)
+
+            for _ in range(self.poisson(args.comments_per_minute / 60)):
+                username, unique_id = self.user()
+                await self.server.ingest_comment(username, unique_id, self.comment_text(answer), None)
+            for _ in range(self.poisson(args.gifts_per_minute / 60)):
+                username, unique_id = self.user()
+                gift_id, gift_name, _ = self.random.choice(GIFTS)
+                await self.server.process_gift(username, unique_id, gift_name, gift_id, self.random.randint(1, 20))
+            for _ in range(self.poisson(args.likes_per_minute / 60)):
+                username, unique_id = self.user()
+                await self.server.process_like(username, unique_id, self.random.randint(1, 15))
+            if self.random.random() < args.follows_per_minute / 60:
+                await self.server.process_follow(*self.user())
+
+            # El lote nunca espera más de un segundo simulado
+            await self.server.flush_comments()
+
+            if second % max(1, int(self.server.closest_guesses_interval)) == 0:
+                self.server.closest_guesses.score_pending()
+
+            # Dejar correr las tareas pendientes del event loop
+            if second % 60 == 0:
+                await asyncio.sleep(0)
+
+            if second == warmup_seconds:
+                baseline = tracemalloc.take_snapshot()
+                previous = baseline
+
+            if second > 0 and second % snapshot_seconds == 0:
+                # La RSS se mide en cada intervalo, también durante el warmup
+                rss = self.sample_rss()
+                if baseline is not None and second > warmup_seconds:
+                    snapshot = tracemalloc.take_snapshot()
+                    self.report(second, snapshot, previous, baseline, rss)
+                    previous = snapshot
+
+        await self.server.wait_for_winners()
+        final = tracemalloc.take_snapshot()
+        self.growth_bytes = sum(stat.size_diff for stat in final.compare_to(baseline, 'filename'))
+        rss = self.sample_rss()
+        self.report(total_seconds, final, previous, baseline, rss)
+
+        elapsed = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"\nSOAK TERMINADO: {args.hours}h simuladas en {elapsed:.1f}s reales")
+        print(f"EVENTOS enviados: {self.events_sent} (ganadores: {self.winners})")
+        print(f"TRACEMALLOC actual {current / 1024 / 1024:.1f} MB, pico {peak / 1024 / 1024:.1f} MB, "
+              f"crecimiento desde el baseline {self.growth_bytes / 1024 / 1024:.2f} MB")
+
+        failed = False
+        if args.growth_limit_mb is not None and self.growth_bytes > args.growth_limit_mb * 1024 * 1024:
+            print(f"FALLO: crecimiento de {self.growth_bytes / 1024 / 1024:.2f} MB supera el limite de {args.growth_limit_mb} MB")
+            failed = True
+        if self.peak_rss > args.rss_limit_mb:
+            print(f"FALLO: memoria residente {self.peak_rss:.1f} MB supera el limite de {args.rss_limit_mb} MB")
+            failed = True
+        if failed:
+            return 1
+        if not self.peak_rss:
+            print("AVISO: no se pudo medir la memoria residente en esta plataforma")
+        else:
+            print(f"OK: memoria residente maxima {self.peak_rss:.1f} MB (limite {args.rss_limit_mb} MB)")
+        return 0
+
+    def sample_rss(self) -> Optional[float]:
+        rss = resident_memory_mb()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def poisson(self, rate: float) -> int:
+        """Número de eventos en un segundo para una tasa media dada"""
+        count = int(rate)
+        if self.random.random() < rate - count:
+            count += 1
+        return count
+
+    def report(self, second: int, snapshot, previous, baseline, rss: Optional[float]):
+        hours = second / 3600
+        rss_text = f"{rss:.1f} MB" if rss is not None else "n/d"
+        print(f"\n[{hours:5.2f}h] RSS {rss_text} - sitios con mayor crecimiento desde el snapshot anterior:")
+        for stat in snapshot.compare_to(previous, 'lineno')[:self.args.top]:
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            print(f"  +{stat.size_diff / 1024:9.1f} KB  (+{stat.count_diff} bloques)  {frame.filename}:{frame.lineno}")
+
+        growth = sum(stat.size_diff for stat in snapshot.compare_to(baseline, 'filename'))
+        print(f"  crecimiento total desde el baseline: {growth / 1024:.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Soak test de memoria para TikTokLiveServer')
+    parser.add_argument('--hours', type=float, default=8, help='Horas de live a simular')
+    parser.add_argument('--comments-per-minute', type=float, default=1000)
+    parser.add_argument('--gifts-per-minute', type=float, default=30)
+    parser.add_argument('--likes-per-minute', type=float, default=300)
+    parser.add_argument('--follows-per-minute', type=float, default=5)
+    parser.add_argument('--rounds-per-hour', type=float, default=30)
+    parser.add_argument('--batch-comments', type=int, default=0, help='Micro-batch de comentarios (0 = desactivado)')
+    parser.add_argument('--users', type=int, default=20000, help='Usuarios distintos en el chat')
+    parser.add_argument('--warmup-minutes', type=int, default=10, help='Minutos simulados antes del baseline')
+    parser.add_argument('--snapshot-minutes', type=int, default=30, help='Minutos simulados entre snapshots')
+    parser.add_argument('--top', type=int, default=10, help='Sitios de asignación a mostrar por snapshot')
+    parser.add_argument('--trace-depth', type=int, default=1, help='Frames guardados por tracemalloc')
+    parser.add_argument('--rss-limit-mb', type=float, default=300, help='Límite de memoria residente')
+    parser.add_argument('--growth-limit-mb', type=float, default=None,
+                        help='Límite de crecimiento de tracemalloc entre el baseline y el final')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(SoakTest(args).run()))
+
+
+if __name__ == "__main__":
+    main()
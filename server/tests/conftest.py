@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los módulos del servidor se importan como top-level (igual que al correr desde server/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
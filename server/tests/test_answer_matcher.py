@@ -0,0 +1,35 @@
+from answer_matcher import AnswerMatcher, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text('  ¡Gato,   negro!  ') == 'GATO NEGRO'
+
+
+def test_exact_match():
+    matcher = AnswerMatcher('Gato Negro')
+    assert matcher.match(normalize_text('gato negro!!')) == 'EXACTO'
+
+
+def test_contained_match():
+    matcher = AnswerMatcher('Gato Negro')
+    assert matcher.match(normalize_text('creo que es gato negro')) == 'CONTENIDO'
+
+
+def test_word_ratio_match():
+    matcher = AnswerMatcher('cien años de soledad')
+    # 3 de 4 palabras (75%) en otro orden: supera el 70%
+    assert matcher.match(normalize_text('soledad de cien')) == 'PALABRAS'
+    # 2 de 4 palabras (50%): no alcanza
+    assert matcher.match(normalize_text('cien soledad')) is None
+
+
+def test_single_word_answer_needs_the_word():
+    matcher = AnswerMatcher('pizza')
+    assert matcher.match(normalize_text('pizz')) is None
+    assert matcher.match(normalize_text('quiero pizza')) == 'CONTENIDO'
+
+
+def test_match_batch_keeps_order():
+    matcher = AnswerMatcher('gato negro')
+    comments = [normalize_text(text) for text in ('hola', 'gato negro', 'un gato negro', 'negro')]
+    assert matcher.match_batch(comments) == [None, 'EXACTO', 'CONTENIDO', None]
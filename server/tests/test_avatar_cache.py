@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from avatar_cache import AvatarCache
+
+
+def test_shared_returns_one_cache_per_directory(tmp_path):
+    first = AvatarCache.shared(tmp_path / 'a')
+    assert AvatarCache.shared(tmp_path / 'a') is first
+    assert AvatarCache.shared(tmp_path / 'b') is not first
+
+
+def test_non_string_urls_are_ignored(tmp_path):
+    cache = AvatarCache(tmp_path)
+    picture = SimpleNamespace(urls=[])
+    assert cache.prefetch(picture) is None
+    assert cache.prefetch(None) is None
+    assert cache.prefetch('avatar.jpg') is None
+    assert cache.local_url(picture) is None
+    assert cache.local_url('https://cdn.example/miss.jpg') is None
+
+
+def test_existing_files_are_evicted_oldest_first(tmp_path):
+    for index in range(4):
+        (tmp_path / f'{index}.img').write_bytes(b'x' * 100)
+    cache = AvatarCache(tmp_path, max_bytes=250)
+    assert cache.total_bytes <= 250
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(cache.files)
+
+
+def test_prefetch_downloads_once_and_serves_local_url(tmp_path):
+    requests = []
+
+    async def avatar(request):
+        requests.append(request.path)
+        return web.Response(body=b'\x89PNG-fake', content_type='image/png')
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/avatar.png', avatar)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f'http://127.0.0.1:{port}/avatar.png'
+
+        cache = AvatarCache(tmp_path, url_prefix='/avatars')
+        try:
+            first = cache.prefetch(url)
+            assert cache.prefetch(url) is first
+            await first
+            return cache.local_url(url)
+        finally:
+            await cache.close()
+            await runner.cleanup()
+
+    local = asyncio.run(main())
+    assert requests == ['/avatar.png']
+    assert local.startswith('/avatars/') and local.endswith('.png')
@@ -0,0 +1,46 @@
+import pytest
+
+from answer_matcher import normalize_text
+from closest_guesses import ClosestGuessTracker, np
+
+
+def test_inactive_round_ignores_comments():
+    tracker = ClosestGuessTracker()
+    tracker.add('ana', 'Ana', 'GATO')
+    assert tracker.score_pending() == 0
+    assert tracker.top() == []
+
+
+def test_top_keeps_best_comment_per_user():
+    tracker = ClosestGuessTracker(top_n=2)
+    tracker.reset(normalize_text('gato negro'))
+    tracker.add('ana', 'Ana', normalize_text('perro'))
+    tracker.add('ana', 'Ana', normalize_text('gato negro'))
+    tracker.add('luis', 'Luis', normalize_text('gato'))
+    tracker.add('eva', 'Eva', normalize_text('hola'))
+    assert tracker.score_pending() == 4
+
+    top = tracker.top()
+    assert [entry['unique_id'] for entry in top] == ['ana', 'luis']
+    assert top[0]['comment'] == 'GATO NEGRO'
+    assert top[0]['score'] == pytest.approx(1.0)
+
+
+def test_reset_clears_previous_round():
+    tracker = ClosestGuessTracker()
+    tracker.reset('GATO')
+    tracker.add('ana', 'Ana', 'GATO')
+    tracker.score_pending()
+    tracker.reset('PERRO')
+    assert tracker.top() == []
+
+
+@pytest.mark.skipif(np is None, reason='NumPy no instalado')
+def test_numpy_scores_match_python():
+    tracker = ClosestGuessTracker()
+    tracker.reset(normalize_text('cien años de soledad'))
+    batch = [
+        (f'u{i}', 'U', normalize_text(text))
+        for i, text in enumerate(['cien años', 'soledad 😀', 'ñandú', 'A', 'cien anos de soledad', 'x y z'])
+    ]
+    assert tracker._score_numpy(batch) == pytest.approx(tracker._score_python(batch), abs=1e-5)
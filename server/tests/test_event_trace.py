@@ -0,0 +1,57 @@
+import json
+import time
+from types import SimpleNamespace
+
+from event_trace import MAX_TIKTOK_DELAY_MS, EventTrace, EventTracer
+
+
+def tiktok_event(delay_ms):
+    return SimpleNamespace(common=SimpleNamespace(create_time=time.time() * 1000 - delay_ms))
+
+
+def read_trace_file(path):
+    return json.loads(path.read_text(encoding='utf-8').rstrip(',\n') + ']')
+
+
+def test_tiktok_delay_is_a_separate_span(tmp_path):
+    tracer = EventTracer(tmp_path / 'traces.json', slow_threshold_ms=0)
+    trace = tracer.start('comment', tiktok_event(3000))
+    trace.mark('send')
+
+    assert 2900 < trace.tiktok_delay_ms < 3500
+    # Las etapas empiezan en el handler: el retraso de TikTok no entra en elapsed_ms
+    assert trace.elapsed_ms() < 1000
+    assert trace.to_payload()['stages']['received'] == 0
+
+    tracer.finish(trace)
+    names = [event['name'] for event in read_trace_file(tmp_path / 'traces.json')]
+    assert names == ['tiktok', 'send']
+
+
+def test_old_messages_are_not_slow(tmp_path):
+    tracer = EventTracer(tmp_path / 'traces.json', slow_threshold_ms=1000)
+    trace = tracer.start('comment', tiktok_event(5000))
+    trace.mark('send')
+    tracer.finish(trace)
+    assert tracer.slow_traces == 0
+    assert not (tmp_path / 'traces.json').exists()
+
+
+def test_skewed_create_time_is_ignored():
+    assert EventTrace('like', time.time() * 1000 + 5000).tiktok_delay_ms is None
+    assert EventTrace('like', time.time() * 1000 - MAX_TIKTOK_DELAY_MS - 1000).tiktok_delay_ms is None
+    assert 'tiktok_delay_ms' not in EventTrace('like').to_payload()
+
+
+def test_slow_trace_is_written_and_rotated(tmp_path):
+    trace_file = tmp_path / 'traces.json'
+    tracer = EventTracer(trace_file, slow_threshold_ms=0, max_bytes=1)
+    for _ in range(2):
+        trace = tracer.start('gift')
+        trace.mark('send')
+        tracer.finish(trace, {'express_received_ms': trace.start_wall_ms + 1,
+                              'express_handled_ms': trace.start_wall_ms + 2})
+
+    assert tracer.slow_traces == 2
+    assert trace_file.with_suffix('.1.json').exists()
+    assert [event['name'] for event in read_trace_file(trace_file)] == ['send', 'express']
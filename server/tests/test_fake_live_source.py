@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+
+from fake_live_source import FakeLiveSource, synthetic_script
+from tiktok_live_simple import TikTokLiveServer
+
+
+def run_script(script, **source_options):
+    """Correr un guion completo contra TikTokLiveServer y devolver los eventos enviados a Express"""
+    events = []
+
+    async def sink(body: bytes) -> bool:
+        events.append(json.loads(body))
+        return True
+
+    async def main():
+        source = FakeLiveSource(script, speed=1000, **source_options)
+        server = TikTokLiveServer(event_sink=sink, event_source=source)
+        server.reconnect_base_delay = 0
+        source.on_round = server.update_game_state
+        result = await server.connect_to_live('fake_streamer')
+        assert result['success']
+        await asyncio.wait_for(source.finished.wait(), 10)
+        return source, server
+
+    source, server = asyncio.run(main())
+    return events, source, server
+
+
+def of_type(events, event_type):
+    return [event['data'] for event in events if event['event'] == event_type]
+
+
+def test_winner_events():
+    events, _, server = run_script([
+        {'type': 'round', 'answer': 'Gato Negro', 'phrase': 'G _ _ O', 'category': 'ANIMALES'},
+        {'type': 'comment', 'user': 'ana', 'text': 'perro'},
+        {'type': 'comment', 'user': 'luis', 'text': 'gato negro!'},
+        {'type': 'comment', 'user': 'eva', 'text': 'creo que es un gato negro'},
+        {'type': 'live_end'}
+    ], ordered=True)
+
+    winners = of_type(events, 'winner')
+    assert [winner['unique_id'] for winner in winners] == ['luis', 'eva']
+    assert winners[0]['answer'] == 'Gato Negro'
+    assert winners[0]['category'] == 'ANIMALES'
+    assert server.round_stats.current.correct_count == 2
+    assert of_type(events, 'live_end') == [{'connected': False, 'reason': 'live_ended'}]
+
+
+def test_only_final_streak_gift_is_forwarded():
+    events, source, _ = run_script([
+        {'type': 'gift', 'user': 'ana', 'gift_id': 5655, 'gift_name': 'Rose', 'count': 5,
+         'streakable': True, 'streak_interval': 0},
+        {'type': 'gift', 'user': 'luis', 'gift_id': 5879, 'gift_name': 'Love Bang', 'count': 1},
+        {'type': 'live_end'}
+    ], ordered=True)
+
+    assert source.emitted['gift'] == 6
+    gifts = of_type(events, 'gift')
+    assert [(gift['unique_id'], gift['gift_name'], gift['quantity']) for gift in gifts] == [
+        ('ana', 'Rose', 5), ('luis', 'Love Bang', 1)
+    ]
+
+
+def test_reconnect_continues_from_script_position():
+    events, source, server = run_script([
+        {'type': 'round', 'answer': 'pizza'},
+        {'type': 'comment', 'user': 'ana', 'text': 'pizza'},
+        {'type': 'disconnect'},
+        {'type': 'comment', 'user': 'luis', 'text': 'pizza'},
+        {'type': 'live_end'}
+    ], ordered=True)
+
+    assert source.connections == 2
+    assert source.cursor == len(source.script)
+    assert [event['event'] for event in events if event['event'] != 'closest_guesses'] == [
+        'connect', 'winner', 'disconnect', 'connect', 'winner', 'live_end'
+    ]
+    # Sin repetir el guion desde el principio: cada comentario se vio una sola vez
+    assert [winner['unique_id'] for winner in of_type(events, 'winner')] == ['ana', 'luis']
+    assert server.transcript.stats()['comments'] == 2
+
+
+def test_concurrent_handlers_process_synthetic_script():
+    script = synthetic_script('gato negro', comments=200, comment_interval=0, winner_every=50)
+    events, source, _ = run_script(script)
+
+    assert source.emitted['comment'] == 200
+    assert len(of_type(events, 'winner')) >= 4
+    assert source.stats()['connections'] == 1
+
+
+def test_batch_winners_are_posted_concurrently_in_order():
+    started = []
+
+    async def slow_sink(body: bytes) -> bool:
+        event = json.loads(body)
+        if event['event'] == 'winner':
+            started.append(event['data']['unique_id'])
+        await asyncio.sleep(0.05)
+        return True
+
+    async def main():
+        server = TikTokLiveServer(event_sink=slow_sink)
+        server.comment_batch_size = 20
+        server.update_game_state('G _ _ O', 'gato', 'ANIMALES', True)
+        begin = time.monotonic()
+        for index in range(20):
+            await server.ingest_comment(f'U{index}', f'u{index}', 'gato', None)
+        flushed = time.monotonic() - begin
+        await server.wait_for_winners()
+        return flushed, time.monotonic() - begin, server
+
+    flushed, total, server = asyncio.run(main())
+    assert started == [f'u{index}' for index in range(20)]
+    # El lote no espera a Express y los 20 anuncios tardan un solo round-trip, no 20
+    assert flushed < 0.05
+    assert total < 0.5
+    assert len(server.round_stats.current.express_latencies) == 20
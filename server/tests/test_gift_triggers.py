@@ -0,0 +1,77 @@
+from gift_triggers import GiftTriggerEngine
+
+
+def make_engine(**options):
+    engine = GiftTriggerEngine(**options)
+    engine.load([
+        {'id': 'rose-1', 'giftId': 5655, 'giftName': 'Rose', 'quantity': 1, 'enabled': True},
+        {'id': 'rose-10', 'giftId': 5655, 'giftName': 'Rose', 'quantity': 10, 'enabled': True},
+        {'id': 'galaxy', 'giftId': 5869, 'giftName': 'Galaxy', 'quantity': 1, 'enabled': True},
+        {'id': 'by-name', 'giftId': 9999, 'giftName': 'Perfume', 'quantity': 1, 'enabled': True},
+        {'id': 'disabled', 'giftId': 5655, 'giftName': 'Rose', 'quantity': 1, 'enabled': False},
+        {'id': 'likes', 'giftId': 'likes', 'giftName': 'Likes', 'quantity': 100, 'enabled': True},
+    ])
+    return engine
+
+
+def ids(triggers):
+    return sorted(trigger['id'] for trigger in triggers)
+
+
+def test_not_loaded_evaluates_nothing():
+    engine = GiftTriggerEngine()
+    assert not engine.is_loaded
+    assert engine.evaluate(5655, 'Rose', 100) == []
+
+
+def test_load_skips_disabled_and_communal_triggers():
+    engine = make_engine()
+    assert engine.is_loaded
+    assert engine.trigger_count == 4
+
+
+def test_evaluate_by_quantity():
+    engine = make_engine()
+    assert ids(engine.evaluate(5655, 'Rose', 1)) == ['rose-1']
+    assert ids(engine.evaluate(5655, 'Rose', 12)) == ['rose-1', 'rose-10']
+    assert engine.evaluate(1234, 'Unknown', 50) == []
+
+
+def test_evaluate_by_id_or_name_without_duplicates():
+    engine = make_engine()
+    # Mismo trigger encontrado por ID y por nombre: se devuelve una sola vez
+    assert ids(engine.evaluate('5869', 'galaxy', 1)) == ['galaxy']
+    # Regalo con otro ID pero el nombre configurado
+    assert ids(engine.evaluate(1111, 'PERFUME', 1)) == ['by-name']
+
+
+def test_combo_accumulates_within_window(monkeypatch):
+    engine = make_engine(combo_window=3.0)
+    now = [100.0]
+    monkeypatch.setattr('gift_triggers.time.monotonic', lambda: now[0])
+
+    assert engine.combo_quantity('ana', 5655, 4) == 4
+    now[0] += 1
+    assert engine.combo_quantity('ana', 5655, 6) == 10
+    # Otro usuario u otro regalo no suman al combo
+    assert engine.combo_quantity('luis', 5655, 2) == 2
+    assert engine.combo_quantity('ana', 5869, 1) == 1
+    # Fuera de la ventana el combo empieza de nuevo
+    now[0] += 5
+    assert engine.combo_quantity('ana', 5655, 1) == 1
+
+
+def test_combo_prunes_expired_entries(monkeypatch):
+    engine = make_engine(combo_ttl=10.0)
+    now = [0.0]
+    monkeypatch.setattr('gift_triggers.time.monotonic', lambda: now[0])
+
+    for index in range(300):
+        engine.combo_quantity(f'old{index}', 5655, 1)
+    now[0] += 60
+    for index in range(300):
+        engine.combo_quantity(f'new{index}', 5655, 1)
+
+    # La limpieza amortizada descartó los combos vencidos al crecer el dict
+    assert len(engine.recent_gifts) == 300
+    assert all(key.startswith('new') for key in engine.recent_gifts)
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import live_events
+from live_events import (
+    ClosestGuessesRecord, ConnectRecord, DisconnectRecord, FollowRecord, GiftRecord, GiftTriggerRecord,
+    LikeRecord, LiveEndRecord, WinnerRecord, encode_event
+)
+
+RECORDS = [
+    ConnectRecord('ana', 7000000000000000000),
+    WinnerRecord('Ana', 'ana', None, 'gato negro', 'GATO NEGRO', 'El gato', 'animales', '/avatars/a.jpg'),
+    GiftRecord('Luis', 'luis', 'Rose', 5655, 10, triggers_resolved=True),
+    GiftTriggerRecord('Luis', 'luis', 'Rose', 5655, 10, ['t1', 't2']),
+    LikeRecord('Eva', 'eva', 15),
+    FollowRecord('Ñandú "ñ"', 'nandu'),
+    DisconnectRecord(),
+    LiveEndRecord(),
+    ClosestGuessesRecord([{'unique_id': 'ana', 'score': 0.75}], 'animales'),
+]
+
+
+def expected(record, room=None, trace=None):
+    payload = {'event': record.event_type, 'data': record.to_dict(), 'timestamp': 1700000000}
+    if room is not None:
+        payload['room'] = room
+    if trace is not None:
+        payload['trace'] = trace
+    return payload
+
+
+def test_live_end_keeps_inherited_fields():
+    assert LiveEndRecord().to_dict() == {'connected': False, 'reason': 'live_ended'}
+
+
+@pytest.mark.parametrize('record', RECORDS, ids=lambda record: record.event_type)
+@pytest.mark.parametrize('room, trace', [(None, None), ('sala1', {'stages': {'received': 0}})])
+def test_encoders_match_json_dumps(monkeypatch, record, room, trace):
+    reference = expected(record, room, trace)
+    stdlib_reference = json.dumps(reference, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    if live_events.orjson is not None:
+        assert json.loads(encode_event(record, 1700000000, room, trace)) == reference
+
+    monkeypatch.setattr(live_events, 'orjson', None)
+    assert encode_event(record, 1700000000, room, trace) == stdlib_reference
@@ -0,0 +1,69 @@
+import asyncio
+
+import live_supervisor
+from live_supervisor import FRAME_CONTROL, FRAME_EVENT, FRAME_HEADER, pack_frame, read_frame, shard_rooms, watch_room
+
+
+def test_shard_rooms_round_robin():
+    assert shard_rooms(['a', 'b', 'c', 'd', 'e'], 2) == [['a', 'c', 'e'], ['b', 'd']]
+
+
+def test_shard_rooms_never_more_workers_than_rooms():
+    assert shard_rooms(['a', 'b'], 8) == [['a'], ['b']]
+    assert shard_rooms(['a'], 0) == [['a']]
+
+
+def test_pack_frame_header():
+    frame = pack_frame(FRAME_EVENT, b'{"event":"like"}')
+    assert frame[:FRAME_HEADER.size] == b'E\x00\x00\x00\x10'
+    assert frame[FRAME_HEADER.size:] == b'{"event":"like"}'
+
+
+def test_read_frame_roundtrip():
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(pack_frame(FRAME_CONTROL, b'{"action":"hello"}') + pack_frame(FRAME_EVENT, b''))
+        reader.feed_eof()
+        return await read_frame(reader), await read_frame(reader)
+
+    first, second = asyncio.run(main())
+    assert first == (FRAME_CONTROL, b'{"action":"hello"}')
+    assert second == (FRAME_EVENT, b'')
+
+
+class FlakyRoomServer:
+    """Sala que no está en vivo los primeros intentos y luego se cae una vez"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.is_connected = False
+        self.reconnect_base_delay = 0.001
+        self.max_reconnect_attempts = 5
+        self.attempts = 0
+
+    async def connect_to_live(self, room):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            return {'success': False, 'error': 'no está en vivo'}
+        self.is_connected = self.attempts == self.failures + 1
+        return {'success': True}
+
+
+def test_watch_room_retries_until_live(monkeypatch):
+    monkeypatch.setattr(live_supervisor, 'ROOM_CHECK_INTERVAL', 0.001)
+
+    async def main():
+        server = FlakyRoomServer(failures=3)
+        task = asyncio.create_task(watch_room('sala', server, max_delay=0.002))
+        while not server.is_connected:
+            await asyncio.sleep(0.001)
+        # Se cae: el watcher vuelve a conectar sin ayuda del propio servidor
+        server.is_connected = False
+        while server.attempts < 5:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        return server
+
+    server = asyncio.run(main())
+    assert server.max_reconnect_attempts == 0
+    assert server.attempts == 5
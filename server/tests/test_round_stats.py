@@ -0,0 +1,56 @@
+import time
+
+from round_stats import RoundStats, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [40, 10, 30, 20]
+    assert percentile(values, 50) == 20
+    assert percentile(values, 95) == 40
+    assert percentile([], 50) is None
+
+
+def test_round_timing_and_rate():
+    stats = RoundStats()
+    stats.start_round('GATO')
+    start = stats.current.activated_at
+    stats.record_correct(start + 2.0)
+    stats.record_correct(start + 3.0)
+    stats.record_correct(start + 4.0)
+    stats.record_express_ack(0.05)
+    stats.end_round()
+
+    summary = stats.summary()
+    assert summary['current_round'] is None
+    round_summary = summary['recent_rounds'][0]
+    assert round_summary['answer'] == 'GATO'
+    assert round_summary['time_to_first_correct_s'] == 2.0
+    assert round_summary['correct_count'] == 3
+    assert round_summary['correct_per_second'] == 1.0
+    assert round_summary['express_latency_ms'] == [50.0]
+    assert summary['express_latency_ms'] == {'p50': 50.0, 'p95': 50.0}
+
+
+def test_same_answer_keeps_current_round():
+    stats = RoundStats()
+    stats.start_round('GATO')
+    first = stats.current
+    stats.start_round('GATO')
+    assert stats.current is first
+    stats.start_round('PERRO')
+    assert [r.answer for r in stats.recent] == ['GATO']
+
+
+def test_hits_without_round_are_ignored():
+    stats = RoundStats()
+    stats.record_correct(time.monotonic())
+    stats.record_express_ack(0.1)
+    assert stats.summary()['recent_rounds'] == []
+
+
+def test_recent_rounds_are_bounded():
+    stats = RoundStats(max_rounds=3)
+    for answer in ('A', 'B', 'C', 'D', 'E'):
+        stats.start_round(answer)
+    stats.end_round()
+    assert [r.answer for r in stats.recent] == ['C', 'D', 'E']
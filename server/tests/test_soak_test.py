@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+
+from soak_test import SoakTest, resident_memory_mb
+
+
+def soak_args(**overrides):
+    options = dict(
+        hours=0.25, comments_per_minute=600, gifts_per_minute=30, likes_per_minute=120, follows_per_minute=5,
+        rounds_per_hour=30, batch_comments=0, users=500, warmup_minutes=2, snapshot_minutes=5, top=3,
+        trace_depth=1, rss_limit_mb=300, growth_limit_mb=2, seed=1
+    )
+    options.update(overrides)
+    return argparse.Namespace(**options)
+
+
+def test_short_soak_has_bounded_growth(capsys):
+    soak = SoakTest(soak_args())
+
+    assert asyncio.run(soak.run()) == 0
+    assert soak.winners > 0
+    # Solo el transcript (que guarda 12 h) debería crecer: unos cientos de KB en 13 minutos
+    assert 0 < soak.growth_bytes < 2 * 1024 * 1024
+    if resident_memory_mb() is not None:
+        assert 0 < soak.peak_rss < 300
+    assert 'SOAK TERMINADO' in capsys.readouterr().out
+
+
+def test_run_shorter_than_warmup_is_still_measured(capsys):
+    soak = SoakTest(soak_args(hours=0.02, warmup_minutes=10))
+
+    assert asyncio.run(soak.run()) == 0
+    output = capsys.readouterr().out
+    assert 'AVISO: warmup mayor que la corrida' in output
+    assert 'crecimiento desde el baseline' in output
+    if resident_memory_mb() is not None:
+        assert soak.peak_rss > 0
+
+
+def test_growth_limit_fails_the_run():
+    soak = SoakTest(soak_args(hours=0.1, growth_limit_mb=0))
+    assert asyncio.run(soak.run()) == 1
@@ -0,0 +1,38 @@
+from transcript_index import TranscriptIndex
+
+
+def test_search_requires_all_words_newest_first():
+    index = TranscriptIndex()
+    index.add('ana', 'Ana', 'HOLA GATO NEGRO', 10.0)
+    index.add('luis', 'Luis', 'GATO', 11.0)
+    index.add('eva', 'Eva', 'NEGRO GATO', 12.0)
+
+    results = index.search('GATO NEGRO')
+    assert [result['unique_id'] for result in results] == ['eva', 'ana']
+    assert results[0] == {'unique_id': 'eva', 'username': 'Eva', 'timestamp': 12.0}
+    assert index.search('PERRO') == []
+    assert index.search('') == []
+
+
+def test_search_since_until_across_segments():
+    index = TranscriptIndex(segment_seconds=10)
+    for second in range(0, 50, 5):
+        index.add(f'user{second}', f'User {second}', 'HOLA', float(second))
+
+    found = [result['timestamp'] for result in index.search('HOLA', since=12, until=31)]
+    assert found == [30.0, 25.0, 20.0, 15.0]
+    assert [result['timestamp'] for result in index.search('HOLA', limit=2)] == [45.0, 40.0]
+
+
+def test_eviction_drops_old_segments_and_their_users():
+    index = TranscriptIndex(segment_seconds=10, max_age_seconds=30)
+    for second in range(100):
+        index.add(f'user{second}', f'User {second}', 'HOLA', float(second))
+
+    stats = index.stats()
+    assert stats['segments'] <= 5
+    assert stats['comments'] == stats['users'] < 100
+    # Se descartan segmentos completos: queda a lo sumo un segmento más que la edad máxima
+    oldest = min(result['timestamp'] for result in index.search('HOLA', limit=500))
+    assert oldest >= 90 - 30 - 10
+    assert index.search('HOLA', until=45) == []
@@ -10,6 +10,83 @@ class TikTokLiveManager {
     this.configFile = path.join(__dirname, 'tiktok_live_config.json');
     this.restartAttempts = 0;
     this.maxRestartAttempts = 5;
+    this.pythonStatus = null; // Último estado reportado por Python (acción get_status)
+    this.pendingRequests = new Map(); // request_id -> { resolve, reject, timer } de pedidos a Python
+    this.nextRequestId = 1;
+    this.stdoutBuffer = ''; // Línea incompleta de stdout (una respuesta larga llega en varios chunks)
+  }
+
+  // Procesar salida estándar de Python (logs y respuestas STATUS / TRANSCRIPT)
+  handleStdout(data) {
+    const lines = (this.stdoutBuffer + data.toString()).split('\n');
+    this.stdoutBuffer = lines.pop(); // Lo que sigue al último salto de línea aún no está completo
+    const logLines = [];
+    for (const rawLine of lines) {
+      const line = rawLine.trim();
+      if (!line) continue;
+      if (line.startsWith('STATUS ')) {
+        const reply = this.parseReply(line.slice('STATUS '.length));
+        if (reply) this.resolveRequest(reply);
+      } else if (line.startsWith('TRANSCRIPT ')) {
+        // No repetir resultados de búsqueda en los logs
+        const reply = this.parseReply(line.slice('TRANSCRIPT '.length));
+        if (reply) this.resolveRequest(reply);
+      } else {
+        logLines.push(line);
+      }
+    }
+    if (logLines.length > 0) {
+      console.log(`🐍 [Python] ${logLines.join('\n')}`);
+    }
+  }
+
+  parseReply(json) {
+    try {
+      return JSON.parse(json);
+    } catch (error) {
+      console.error('❌ [TikTok Live] Respuesta inválida de Python:', error.message);
+      return null;
+    }
+  }
+
+  // Entregar una respuesta al pedido con el mismo request_id (las tardías se descartan)
+  resolveRequest(reply) {
+    const { request_id: requestId, ...payload } = reply;
+    const pending = this.pendingRequests.get(requestId);
+    if (!pending) return;
+    clearTimeout(pending.timer);
+    this.pendingRequests.delete(requestId);
+    pending.resolve(payload);
+  }
+
+  // Enviar un pedido a Python por stdin y esperar su respuesta (con timeout)
+  requestPython(action, data, timeoutMs) {
+    if (!this.isRunning || !this.pythonProcess || !this.pythonProcess.stdin) {
+      return Promise.reject(new Error('Servidor Python no está corriendo'));
+    }
+
+    const requestId = this.nextRequestId++;
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pendingRequests.delete(requestId);
+        reject(new Error('Timeout esperando respuesta de Python'));
+      }, timeoutMs);
+      this.pendingRequests.set(requestId, { resolve, reject, timer });
+
+      const message = { action, request_id: requestId };
+      if (data !== undefined) message.data = data;
+      this.pythonProcess.stdin.write(JSON.stringify(message) + '\n');
+    });
+  }
+
+  // El proceso terminó: ningún pedido pendiente va a recibir respuesta
+  rejectPendingRequests() {
+    for (const pending of this.pendingRequests.values()) {
+      clearTimeout(pending.timer);
+      pending.reject(new Error('Servidor Python terminado'));
+    }
+    this.pendingRequests.clear();
+    this.stdoutBuffer = '';
   }
 
   // Verificar si Python está instalado
@@ -134,10 +211,7 @@ class TikTokLiveManager {
       this.restartAttempts = 0;
 
       // Manejar stdout
-      this.pythonProcess.stdout.on('data', (data) => {
-        const message = data.toString().trim();
-        console.log(`🐍 [Python] ${message}`);
-      });
+      this.pythonProcess.stdout.on('data', (data) => this.handleStdout(data));
 
       // Manejar stderr
       this.pythonProcess.stderr.on('data', (data) => {
@@ -150,6 +224,7 @@ class TikTokLiveManager {
         console.log(`🐍 [Python] Proceso terminado con código ${code}`);
         this.isRunning = false;
         this.pythonProcess = null;
+        this.rejectPendingRequests();
 
         // Auto-restart solo si el código de salida indica un error de conectividad temporal
         // No hacer auto-restart para errores comunes como "usuario no en vivo"
@@ -242,10 +317,17 @@ class TikTokLiveManager {
     return {
       isRunning: this.isRunning,
       pid: this.pythonProcess ? this.pythonProcess.pid : null,
-      restartAttempts: this.restartAttempts
+      restartAttempts: this.restartAttempts,
+      python: this.pythonStatus
     };
   }
 
+  // Pedir a Python su estado actual (respuesta STATUS por stdout con el mismo request_id)
+  async requestPythonStatus(timeoutMs = 2000) {
+    this.pythonStatus = await this.requestPython('get_status', undefined, timeoutMs);
+    return this.pythonStatus;
+  }
+
   // Iniciar en modo espera (sin conectar automáticamente)
   async startStandby() {
     return await this.start(); // Sin username = modo espera
@@ -292,10 +374,7 @@ class TikTokLiveManager {
     this.restartAttempts = 0;
 
     // Setup event handlers
-    this.pythonProcess.stdout.on('data', (data) => {
-      const message = data.toString().trim();
-      console.log(`🐍 [Python] ${message}`);
-    });
+    this.pythonProcess.stdout.on('data', (data) => this.handleStdout(data));
 
     this.pythonProcess.stderr.on('data', (data) => {
       const message = data.toString().trim();
@@ -306,6 +385,7 @@ class TikTokLiveManager {
       console.log(`🐍 [Python] Proceso terminado con código ${code}`);
       this.isRunning = false;
       this.pythonProcess = null;
+      this.rejectPendingRequests();
 
       // Solo auto-restart para errores técnicos, no para errores de usuario
       if (code === 2 && this.restartAttempts < this.maxRestartAttempts) {
@@ -373,6 +453,28 @@ class TikTokLiveManager {
     }
   }
 
+  // Buscar en el índice de comentarios del stream (respuesta TRANSCRIPT por stdout)
+  searchTranscript(query, options = {}, timeoutMs = 2000) {
+    return this.requestPython('search_transcript', { query, ...options }, timeoutMs);
+  }
+
+  // Enviar los triggers de regalos a Python para que los evalúe localmente (sin reconectar)
+  updateGiftTriggers(triggers) {
+    if (!this.isRunning || !this.pythonProcess || !this.pythonProcess.stdin) {
+      return { success: false, error: 'Servidor Python no está corriendo' };
+    }
+
+    try {
+      const message = { action: 'update_gift_triggers', data: { triggers } };
+      this.pythonProcess.stdin.write(JSON.stringify(message) + '\n');
+      console.log(`🎁 [TikTok Live] ${triggers.length} triggers enviados a Python`);
+      return { success: true };
+    } catch (error) {
+      console.error('❌ [TikTok Live] Error enviando triggers:', error.message);
+      return { success: false, error: error.message };
+    }
+  }
+
   // Limpiar al cerrar la aplicación
   cleanup() {
     if (this.pythonProcess) {
@@ -9,10 +9,9 @@ import json
 import time
 import logging
 import aiohttp
-import re
 import sys
 import threading
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Awaitable, List, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -29,6 +28,18 @@ except ImportError:
     print("ERROR: TikTokLive no esta instalado. Instalalo con: pip install TikTokLive")
     sys.exit(1)
 
+from answer_matcher import AnswerMatcher, normalize_text
+from closest_guesses import ClosestGuessTracker
+from transcript_index import TranscriptIndex, MAX_TRANSCRIPT_RESULTS
+from event_trace import EventTrace, EventTracer
+from round_stats import RoundStats
+from gift_triggers import GiftTriggerEngine
+from avatar_cache import AvatarCache
+from live_events import (
+    LiveEventRecord, ConnectRecord, WinnerRecord, GiftRecord, GiftTriggerRecord, LikeRecord, FollowRecord,
+    DisconnectRecord, LiveEndRecord, ClosestGuessesRecord, encode_event
+)
+
 @dataclass
 class GameState:
     current_phrase: Optional[str] = None
@@ -37,17 +48,66 @@ class GameState:
     is_active: bool = False
     streamer_username: Optional[str] = None
 
+class TikTokLiveSource:
+    """Fuente de eventos real: un TikTokLiveClient por conexión.
+    Cualquier objeto con create_client(unique_id) puede reemplazarla (ver fake_live_source.py)"""
+
+    def create_client(self, unique_id: str) -> TikTokLiveClient:
+        return TikTokLiveClient(unique_id=unique_id)
+
 class TikTokLiveServer:
-    def __init__(self):
+    def __init__(self, event_sink: Optional[Callable[[bytes], Awaitable[bool]]] = None, event_source: Optional[Any] = None,
+                 avatar_cache: Optional[AvatarCache] = None):
+        # De dónde salen los clientes (y por lo tanto los eventos) del live
+        self.event_source = event_source or TikTokLiveSource()
         self.client: Optional[TikTokLiveClient] = None
         self.game_state = GameState()
         self.is_connected = False
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
+        self.reconnect_base_delay = 5
         self.express_server_url = "http://localhost:3002"
         self.config_file = Path(__file__).parent / "tiktok_live_config.json"
         self.stdin_listener_running = False
 
+        # Respuesta de la ronda preparada una sola vez (ver update_game_state)
+        self.answer_matcher: Optional[AnswerMatcher] = None
+
+        # Índice de todos los comentarios del stream para búsquedas de moderación
+        self.transcript = TranscriptIndex()
+
+        # Micro-batching de comentarios: 0 = procesar cada comentario al llegar
+        self.comment_batch_size = 0
+        self.comment_batch_delay = 0.005
+        self.comment_buffer: List[Tuple[str, str, str, Optional[str], Optional[EventTrace]]] = []
+        self.comment_flush_handle: Optional[asyncio.TimerHandle] = None
+        self.comment_flush_lock = asyncio.Lock()
+        # Anuncios de ganadores en curso (con referencia para que no se pierdan)
+        self.winner_tasks: set = set()
+
+        # Si hay event_sink el servidor corre dentro de un worker del supervisor:
+        # los eventos van al supervisor y no se usa stdin ni el archivo de config
+        self.event_sink = event_sink
+
+        # Comentarios más cercanos de la ronda (publicados a cadencia fija)
+        self.closest_guesses = ClosestGuessTracker()
+        self.closest_guesses_interval = 2.0
+        self.closest_guesses_task: Optional[asyncio.Task] = None
+
+        # Tiempos de las rondas recientes (primer acierto, latencia a Express)
+        self.round_stats = RoundStats()
+
+        # Triggers de regalos evaluados localmente (activo cuando Node envía la configuración)
+        self.gift_triggers = GiftTriggerEngine()
+        self.forward_raw_gifts = False
+
+        # Trazas por evento: las que superan el umbral se guardan para un visor de trazas
+        self.tracer = EventTracer(Path(__file__).parent / "event_traces.json")
+
+        # Fotos de perfil de quienes comentan, descargadas antes de que ganen
+        # (los workers del supervisor pasan la cache de su propio directorio)
+        self.avatar_cache = avatar_cache or AvatarCache.shared(Path(__file__).parent / "avatar_cache")
+
         # Setup logging sin caracteres especiales
         logging.basicConfig(
             level=logging.INFO,
@@ -55,11 +115,12 @@ class TikTokLiveServer:
         )
         self.logger = logging.getLogger('TikTokLive')
 
-        # Load saved config
-        self.load_config()
+        if self.event_sink is None:
+            # Load saved config
+            self.load_config()
 
-        # Iniciar listener de stdin en hilo separado
-        self.start_stdin_listener()
+            # Iniciar listener de stdin en hilo separado
+            self.start_stdin_listener()
 
     def load_config(self):
         """Cargar configuración guardada"""
@@ -136,104 +197,307 @@ class TikTokLiveServer:
                 self.update_game_state(phrase, answer, category, is_active)
                 self.logger.info(f"GAME STATE actualizado via stdin: {answer} ({category}) - Activo: {is_active}")
 
+            elif action == 'update_gift_triggers':
+                trigger_data = data.get('data', {})
+                self.gift_triggers.load(trigger_data.get('triggers', []))
+                self.forward_raw_gifts = trigger_data.get('forwardRawGifts', False)
+                self.logger.info(f"GIFT TRIGGERS recargados: {self.gift_triggers.trigger_count} activos")
+
+            elif action == 'search_transcript':
+                # request_id se devuelve tal cual para que Node asocie la respuesta a su pedido
+                reply = self.search_transcript(data.get('data', {}))
+                reply['request_id'] = data.get('request_id')
+                print(f"TRANSCRIPT {json.dumps(reply, ensure_ascii=False)}", flush=True)
+
+            elif action == 'get_status':
+                # Respuesta por stdout en una sola línea para que Node la pueda leer
+                reply = dict(self.get_status(), request_id=data.get('request_id'))
+                print(f"STATUS {json.dumps(reply, ensure_ascii=False)}", flush=True)
+
         except json.JSONDecodeError:
             self.logger.warning(f"MENSAJE STDIN invalido (no JSON): {message}")
         except Exception as e:
             self.logger.error(f"ERROR procesando mensaje stdin: {e}")
 
-    async def notify_express_server(self, event_type: str, data: Dict[str, Any]):
-        """Notificar al servidor Express sobre eventos"""
+    def search_transcript(self, search: Dict[str, Any]) -> Dict[str, Any]:
+        """Buscar en el índice de comentarios ("¿quién dijo X?")"""
+        started = time.perf_counter()
+        limit = min(int(search.get('limit') or 50), MAX_TRANSCRIPT_RESULTS)
+        results = self.transcript.search(
+            normalize_text(search.get('query', '')),
+            limit=limit,
+            since=search.get('since'),
+            until=search.get('until')
+        )
+        return {
+            'query': search.get('query', ''),
+            'results': results,
+            'took_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    async def notify_express_server(self, record: LiveEventRecord, trace: Optional[EventTrace] = None) -> bool:
+        """Notificar al servidor Express sobre eventos (True si Express confirmó)"""
+        if trace is None:
+            trace = self.tracer.start(record.event_type)
         try:
-            payload = {
-                'event': event_type,
-                'data': data,
-                'timestamp': int(time.time())
-            }
-            
+            trace.mark('send')
+            if self.event_sink is not None:
+                body = encode_event(record, int(time.time()), room=self.game_state.streamer_username,
+                                    trace=trace.to_payload())
+                sent = await self.event_sink(body)
+                self.tracer.finish(trace)
+                return sent
+
+            body = encode_event(record, int(time.time()), trace=trace.to_payload())
+
             async with aiohttp.ClientSession() as session:
                 async with session.post(
                     f"{self.express_server_url}/tiktok-live-event",
-                    json=payload,
+                    data=body,
+                    headers={'Content-Type': 'application/json'},
                     timeout=aiohttp.ClientTimeout(total=5)
                 ) as response:
                     if response.status == 200:
-                        self.logger.info(f"EVENTO enviado al servidor: {event_type}")
+                        trace.mark('ack')
+                        self.logger.info(f"EVENTO enviado al servidor: {record.event_type}")
+                        try:
+                            reply = await response.json(content_type=None)
+                            self.tracer.finish(trace, reply.get('trace'))
+                        except Exception:
+                            self.tracer.finish(trace)
+                        return True
                     else:
                         self.logger.warning(f"ERROR enviando evento: {response.status}")
-                        
+
         except Exception as e:
             self.logger.error(f"ERROR notificando servidor: {e}")
+        return False
 
     def normalize_text(self, text: str) -> str:
         """Normalizar texto para comparación"""
-        text = text.upper().strip()
-        text = re.sub(r'[^\w\s]', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text
+        return normalize_text(text)
 
     def check_answer(self, user_comment: str) -> bool:
         """Verificar si el comentario del usuario es la respuesta correcta"""
-        if not self.game_state.current_answer:
+        matcher = self.answer_matcher
+        if matcher is None:
             self.logger.warning(f"CHECK_ANSWER: No hay respuesta actual configurada")
             return False
 
-        normalized_comment = self.normalize_text(user_comment)
-        normalized_answer = self.normalize_text(self.game_state.current_answer)
-
-        self.logger.info(f"CHECK_ANSWER: Comparando '{normalized_comment}' con '{normalized_answer}'")
+        normalized_comment = normalize_text(user_comment)
+        self.logger.info(f"CHECK_ANSWER: Comparando '{normalized_comment}' con '{matcher.answer}'")
 
-        # Coincidencia exacta
-        if normalized_comment == normalized_answer:
-            self.logger.info(f"CHECK_ANSWER: MATCH EXACTO!")
+        match_type = matcher.match(normalized_comment)
+        if match_type:
+            self.logger.info(f"CHECK_ANSWER: MATCH {match_type}!")
             return True
 
-        # La respuesta está contenida en el comentario
-        if normalized_answer in normalized_comment:
-            self.logger.info(f"CHECK_ANSWER: MATCH CONTENIDO!")
-            return True
-
-        # Verificar por palabras individuales si la respuesta tiene múltiples palabras
-        answer_words = normalized_answer.split()
-        comment_words = normalized_comment.split()
+        self.logger.info(f"CHECK_ANSWER: NO MATCH")
+        return False
 
-        if len(answer_words) > 1:
-            # Para frases, verificar que al menos 70% de las palabras coincidan
-            matches = 0
-            for word in answer_words:
-                if word in comment_words:
-                    matches += 1
+    def start_background_tasks(self):
+        """Iniciar tareas periódicas del servidor (una sola vez por proceso)"""
+        if self.closest_guesses_task is None or self.closest_guesses_task.done():
+            self.closest_guesses_task = asyncio.create_task(self.publish_closest_guesses_loop())
 
-            match_percentage = matches / len(answer_words)
-            self.logger.info(f"CHECK_ANSWER: Coincidencias de palabras: {matches}/{len(answer_words)} ({match_percentage*100:.1f}%)")
+    async def publish_closest_guesses_loop(self):
+        """Puntuar el buffer de la ronda y publicar el top-N a cadencia fija"""
+        last_published = None
+        while True:
+            await asyncio.sleep(self.closest_guesses_interval)
+            try:
+                scored = self.closest_guesses.score_pending()
+                top = self.closest_guesses.top()
+                signature = tuple((g['unique_id'], g['score']) for g in top)
+
+                if signature != last_published and (top or last_published):
+                    last_published = signature
+                    self.logger.info(f"CLOSEST GUESSES: {len(top)} usuarios ({scored} comentarios puntuados)")
+                    await self.notify_express_server(ClosestGuessesRecord(top, self.game_state.category))
+            except Exception as e:
+                self.logger.error(f"ERROR publicando closest guesses: {e}")
+
+    async def ingest_comment(self, username: str, unique_id: str, comment: str, profile_picture: Optional[str],
+                             trace: Optional[EventTrace] = None):
+        """Recibir un comentario: directo o acumulado en el micro-batch"""
+        if self.comment_batch_size <= 0:
+            await self.process_comment(username, unique_id, comment, profile_picture, trace)
+            return
 
-            if match_percentage >= 0.7:  # 70% de coincidencia
-                self.logger.info(f"CHECK_ANSWER: MATCH POR PALABRAS!")
-                return True
+        if trace is not None:
+            trace.mark('handler')
+        self.comment_buffer.append((username, unique_id, comment, profile_picture, trace))
+        if len(self.comment_buffer) >= self.comment_batch_size:
+            await self.flush_comments()
+        elif self.comment_flush_handle is None:
+            self.comment_flush_handle = asyncio.get_running_loop().call_later(
+                self.comment_batch_delay, lambda: asyncio.ensure_future(self.flush_comments())
+            )
+
+    async def flush_comments(self):
+        """Procesar el micro-batch acumulado (en orden de llegada entre lotes)"""
+        if self.comment_flush_handle is not None:
+            self.comment_flush_handle.cancel()
+            self.comment_flush_handle = None
+
+        batch, self.comment_buffer = self.comment_buffer, []
+        if not batch:
+            return
+        async with self.comment_flush_lock:
+            winners, hit_at = await self.process_comment_batch(batch)
+
+        # Los anuncios salen fuera del lock, en orden de llegada y sin esperar la
+        # respuesta de Express al anterior: ni el ganador N ni el próximo lote esperan
+        for username, unique_id, comment, profile_picture, trace in winners:
+            task = asyncio.create_task(self.announce_winner(username, unique_id, comment, profile_picture, hit_at, trace))
+            self.winner_tasks.add(task)
+            task.add_done_callback(self.winner_tasks.discard)
+
+    async def wait_for_winners(self):
+        """Esperar los anuncios de ganadores en curso (fin de una corrida de prueba)"""
+        while self.winner_tasks:
+            await asyncio.gather(*self.winner_tasks)
+
+    async def process_comment_batch(self, batch: List[Tuple[str, str, str, Optional[str], Optional[EventTrace]]]):
+        """Comparar un lote de comentarios en una pasada; devuelve los ganadores en orden"""
+        # 'queue' = momento en que cada comentario sale del micro-batch
+        for entry in batch:
+            if entry[4] is not None:
+                entry[4].mark('queue')
+
+        normalized = [normalize_text(comment) for _, _, comment, _, _ in batch]
+        received_at = time.time()
+        for (username, unique_id, _, profile_picture, _), text in zip(batch, normalized):
+            self.transcript.add(unique_id, username, text, received_at)
+            # Descargar la foto de todos los que comentan, también entre rondas
+            self.avatar_cache.prefetch(profile_picture)
+
+        matcher = self.answer_matcher
+        if not self.game_state.is_active or matcher is None:
+            self.logger.info(f"JUEGO INACTIVO - {len(batch)} comentarios ignorados")
+            return [], None
+
+        matches = matcher.match_batch(normalized)
+        hit_at = time.monotonic()
+
+        for (username, unique_id, _, _, _), text in zip(batch, normalized):
+            self.closest_guesses.add(unique_id, username, text)
+
+        winners = [entry for entry, match_type in zip(batch, matches) if match_type]
+        self.logger.info(f"LOTE de {len(batch)} comentarios: {len(winners)} correctos")
+
+        for _, _, _, _, trace in winners:
+            if trace is not None:
+                trace.mark('matched')
+            self.round_stats.record_correct(hit_at)
+        return winners, hit_at
+
+    async def process_comment(self, username: str, unique_id: str, comment: str, profile_picture: Optional[str],
+                              trace: Optional[EventTrace] = None):
+        """Procesar un comentario: buscar ganador si hay una ronda activa"""
+        if trace is not None:
+            trace.mark('handler')
+        self.logger.info(f"COMENTARIO {username} (@{unique_id}): {comment}")
+        self.logger.info(f"PROFILE_PICTURE: {profile_picture}")
+        self.logger.info(f"GAME_STATE: Activo={self.game_state.is_active}, Respuesta='{self.game_state.current_answer}'")
+
+        normalized = normalize_text(comment)
+        self.transcript.add(unique_id, username, normalized)
+        # Descargar la foto de todos los que comentan, también entre rondas
+        self.avatar_cache.prefetch(profile_picture)
+
+        if self.game_state.is_active:
+            self.closest_guesses.add(unique_id, username, normalized)
+
+            if self.check_answer(comment):
+                hit_at = time.monotonic()
+                if trace is not None:
+                    trace.mark('matched')
+                self.round_stats.record_correct(hit_at)
+                await self.announce_winner(username, unique_id, comment, profile_picture, hit_at, trace)
+        else:
+            self.logger.info(f"JUEGO INACTIVO - comentario ignorado")
+
+    async def announce_winner(self, username: str, unique_id: str, comment: str,
+                              profile_picture: Optional[str], hit_at: float, trace: Optional[EventTrace] = None):
+        """Enviar un ganador a Express y registrar la latencia de confirmación"""
+        self.logger.info(f"🎉 GANADOR! {username} respondio correctamente: {comment}")
+
+        # Nunca esperar la descarga (ya se programó al llegar el comentario):
+        # solo se envía la foto local si ya está en disco
+        profile_picture_local = self.avatar_cache.local_url(profile_picture)
+        acknowledged = await self.notify_express_server(WinnerRecord(
+            username, unique_id, profile_picture, comment,
+            self.game_state.current_answer,
+            self.game_state.current_phrase,
+            self.game_state.category,
+            profile_picture_local
+        ), trace)
+        if acknowledged:
+            self.round_stats.record_express_ack(time.monotonic() - hit_at)
+
+    async def process_gift(self, username: str, unique_id: str, gift_name: str, gift_id: Any, quantity: int,
+                           trace: Optional[EventTrace] = None):
+        """Procesar un regalo listo (streak terminado o regalo no-streakable)"""
+        if trace is not None:
+            trace.mark('handler')
+        if not self.gift_triggers.is_loaded:
+            # Sin triggers locales: Express evalúa el regalo como antes
+            await self.notify_express_server(GiftRecord(username, unique_id, gift_name, gift_id, quantity), trace)
+            return
 
-        self.logger.info(f"CHECK_ANSWER: NO MATCH")
-        return False
+        total = self.gift_triggers.combo_quantity(unique_id or username, gift_id, quantity)
+        triggers = self.gift_triggers.evaluate(gift_id, gift_name, total)
+        if trace is not None:
+            trace.mark('matched')
+        if triggers:
+            self.logger.info(f"GIFT TRIGGER: {len(triggers)} trigger(s) para {total}x {gift_name}")
+            await self.notify_express_server(GiftTriggerRecord(
+                username, unique_id, gift_name, gift_id, total,
+                [str(trigger.get('id')) for trigger in triggers]
+            ), trace)
+        if self.forward_raw_gifts:
+            await self.notify_express_server(GiftRecord(
+                username, unique_id, gift_name, gift_id, quantity, triggers_resolved=True
+            ))
+
+    async def process_like(self, username: str, unique_id: str, like_count: int, trace: Optional[EventTrace] = None):
+        """Procesar likes y enviarlos al servidor Express"""
+        if trace is not None:
+            trace.mark('handler')
+        self.logger.info(f"❤️ LIKE de {username} (@{unique_id}): {like_count} like(s)")
+
+        # Enviar evento de like al servidor Express
+        await self.notify_express_server(LikeRecord(username, unique_id, like_count), trace)
+
+    async def process_follow(self, username: str, unique_id: str, trace: Optional[EventTrace] = None):
+        """Procesar un nuevo seguidor y enviarlo al servidor Express"""
+        if trace is not None:
+            trace.mark('handler')
+        self.logger.info(f"👥 FOLLOW de {username} (@{unique_id})")
+
+        # Enviar evento de follow al servidor Express
+        await self.notify_express_server(FollowRecord(username, unique_id), trace)
 
     async def create_client(self, username: str) -> bool:
         """Crear cliente de TikTok Live"""
         try:
             username = username.replace('@', '').strip()
             
-            self.client = TikTokLiveClient(unique_id=username)
+            self.client = self.event_source.create_client(username)
             
             @self.client.on(ConnectEvent)
             async def on_connect(event: ConnectEvent):
                 self.is_connected = True
                 self.reconnect_attempts = 0
                 self.logger.info(f"CONECTADO a @{event.unique_id} (Room ID: {self.client.room_id})")
+                self.start_background_tasks()
                 
-                await self.notify_express_server('connect', {
-                    'username': event.unique_id,
-                    'room_id': self.client.room_id,
-                    'connected': True
-                })
+                await self.notify_express_server(ConnectRecord(event.unique_id, self.client.room_id))
 
             @self.client.on(CommentEvent)
             async def on_comment(event: CommentEvent):
+                trace = self.tracer.start('comment', event)
                 username = event.user.nickname or event.user.unique_id
                 unique_id = event.user.unique_id
                 comment = event.comment
@@ -243,29 +507,14 @@ class TikTokLiveServer:
                 if hasattr(event.user, 'profile_picture') and event.user.profile_picture:
                     if hasattr(event.user.profile_picture, 'urls') and event.user.profile_picture.urls:
                         profile_picture = event.user.profile_picture.urls[0] if event.user.profile_picture.urls else None
+                if not isinstance(profile_picture, str):
+                    profile_picture = None
 
-                self.logger.info(f"COMENTARIO {username} (@{unique_id}): {comment}")
-                self.logger.info(f"PROFILE_PICTURE: {profile_picture}")
-                self.logger.info(f"GAME_STATE: Activo={self.game_state.is_active}, Respuesta='{self.game_state.current_answer}'")
-
-                if self.game_state.is_active:
-                    if self.check_answer(comment):
-                        self.logger.info(f"🎉 GANADOR! {username} respondio correctamente: {comment}")
-
-                        await self.notify_express_server('winner', {
-                            'username': username,
-                            'unique_id': unique_id,
-                            'profile_picture': profile_picture,
-                            'comment': comment,
-                            'answer': self.game_state.current_answer,
-                            'phrase': self.game_state.current_phrase,
-                            'category': self.game_state.category
-                        })
-                else:
-                    self.logger.info(f"JUEGO INACTIVO - comentario ignorado")
+                await self.ingest_comment(username, unique_id, comment, profile_picture, trace)
 
             @self.client.on(GiftEvent)
             async def on_gift(event: GiftEvent):
+                trace = self.tracer.start('gift', event)
                 username = event.user.nickname or event.user.unique_id
                 unique_id = event.user.unique_id
                 gift_name = event.gift.name
@@ -317,51 +566,31 @@ class TikTokLiveServer:
 
                 # Solo enviar al servidor si debemos procesar
                 if should_process:
-                    await self.notify_express_server('gift', {
-                        'username': username,
-                        'unique_id': unique_id,
-                        'gift_name': gift_name,
-                        'gift_id': gift_id,
-                        'quantity': quantity
-                    })
+                    await self.process_gift(username, unique_id, gift_name, gift_id, quantity, trace)
 
             @self.client.on(LikeEvent)
             async def on_like(event: LikeEvent):
+                trace = self.tracer.start('like', event)
                 username = event.user.nickname or event.user.unique_id
                 unique_id = event.user.unique_id
                 like_count = getattr(event, 'count', 1)  # Número de likes
 
-                self.logger.info(f"❤️ LIKE de {username} (@{unique_id}): {like_count} like(s)")
-
-                # Enviar evento de like al servidor Express
-                await self.notify_express_server('like', {
-                    'username': username,
-                    'unique_id': unique_id,
-                    'count': like_count
-                })
+                await self.process_like(username, unique_id, like_count, trace)
 
             @self.client.on(FollowEvent)
             async def on_follow(event: FollowEvent):
+                trace = self.tracer.start('follow', event)
                 username = event.user.nickname or event.user.unique_id
                 unique_id = event.user.unique_id
 
-                self.logger.info(f"👥 FOLLOW de {username} (@{unique_id})")
-
-                # Enviar evento de follow al servidor Express
-                await self.notify_express_server('follow', {
-                    'username': username,
-                    'unique_id': unique_id
-                })
+                await self.process_follow(username, unique_id, trace)
 
             @self.client.on(DisconnectEvent)
             async def on_disconnect(event: DisconnectEvent):
                 self.is_connected = False
                 self.logger.warning(f"DESCONECTADO del live")
                 
-                await self.notify_express_server('disconnect', {
-                    'connected': False,
-                    'reason': 'disconnect_event'
-                })
+                await self.notify_express_server(DisconnectRecord())
                 
                 if self.reconnect_attempts < self.max_reconnect_attempts:
                     await self.attempt_reconnect()
@@ -371,10 +600,7 @@ class TikTokLiveServer:
                 self.is_connected = False
                 self.logger.info("LIVE ha terminado")
                 
-                await self.notify_express_server('live_end', {
-                    'connected': False,
-                    'reason': 'live_ended'
-                })
+                await self.notify_express_server(LiveEndRecord())
 
             return True
             
@@ -386,7 +612,7 @@ class TikTokLiveServer:
         """Verificar si un usuario está en vivo antes de conectar"""
         try:
             # Crear cliente temporal para verificar
-            temp_client = TikTokLiveClient(unique_id=username)
+            temp_client = self.event_source.create_client(username)
             is_live = await temp_client.is_live()
             self.logger.info(f"VERIFICACION LIVE @{username}: {is_live}")
             return is_live
@@ -398,7 +624,9 @@ class TikTokLiveServer:
         """Conectar al live de TikTok"""
         try:
             self.game_state.streamer_username = username
-            self.save_config()
+            # Un source falso no debe pisar el usuario guardado
+            if self.event_sink is None and isinstance(self.event_source, TikTokLiveSource):
+                self.save_config()
 
             # Verificar primero si el usuario está en vivo
             self.logger.info(f"VERIFICANDO si @{username} está en vivo...")
@@ -439,7 +667,7 @@ class TikTokLiveServer:
             return
             
         self.reconnect_attempts += 1
-        wait_time = min(30, 5 * self.reconnect_attempts)
+        wait_time = min(30, self.reconnect_base_delay * self.reconnect_attempts)
         
         self.logger.info(f"INTENTO de reconexion {self.reconnect_attempts}/{self.max_reconnect_attempts} en {wait_time}s...")
         
@@ -471,7 +699,14 @@ class TikTokLiveServer:
         self.game_state.current_answer = answer
         self.game_state.category = category
         self.game_state.is_active = is_active
-        
+        self.answer_matcher = AnswerMatcher(answer) if answer else None
+        self.closest_guesses.reset(self.normalize_text(answer) if is_active and answer else None)
+
+        if is_active and answer:
+            self.round_stats.start_round(answer)
+        else:
+            self.round_stats.end_round()
+
         self.logger.info(f"GAME STATE actualizado: {answer} ({category}) - Activo: {is_active}")
 
     def get_status(self) -> Dict[str, Any]:
@@ -482,7 +717,9 @@ class TikTokLiveServer:
             'game_active': self.game_state.is_active,
             'current_phrase': self.game_state.current_phrase,
             'room_id': getattr(self.client, 'room_id', None) if self.client else None,
-            'reconnect_attempts': self.reconnect_attempts
+            'reconnect_attempts': self.reconnect_attempts,
+            'round_stats': self.round_stats.summary(),
+            'transcript': self.transcript.stats()
         }
 
 # Función principal
@@ -492,14 +729,47 @@ async def main():
     parser = argparse.ArgumentParser(description='TikTok Live Server')
     parser.add_argument('--username', '-u', type=str, help='Usuario de TikTok para conectar')
     parser.add_argument('--auto-start', action='store_true', help='Iniciar automáticamente si hay usuario guardado')
+    parser.add_argument('--rooms', type=str, help='Modo supervisor: usuarios separados por comas, repartidos entre procesos worker')
+    parser.add_argument('--workers', type=int, default=None, help='Modo supervisor: número de workers (por defecto: núcleos de CPU)')
+    parser.add_argument('--batch-comments', type=int, default=0, help='Procesar comentarios en lotes de hasta N (0 = desactivado)')
+    parser.add_argument('--batch-delay-ms', type=float, default=5, help='Espera máxima de un comentario en el lote (ms)')
+    parser.add_argument('--fake-script', type=str, help='Usar un source falso con este guion JSON en lugar de TikTok (ver fake_live_source.py)')
+    parser.add_argument('--fake-speed', type=float, default=1.0, help='Multiplicador de velocidad del guion falso')
+    parser.add_argument('--fake-ordered', action='store_true', help='Esperar cada handler antes del siguiente evento del guion')
     args = parser.parse_args()
-    
-    server = TikTokLiveServer()
+
+    if args.rooms:
+        from live_supervisor import LiveSupervisor
+        # Sin TikTokLiveServer en este proceso nadie más configura el logging
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        rooms = [room.replace('@', '').strip() for room in args.rooms.split(',') if room.strip()]
+        print(f"INICIANDO supervisor para {len(rooms)} salas...")
+        await LiveSupervisor(rooms, args.workers).run()
+        return
+
+    fake_source = None
+    if args.fake_script:
+        from fake_live_source import FakeLiveSource
+        fake_source = FakeLiveSource.from_file(Path(args.fake_script), speed=args.fake_speed, ordered=args.fake_ordered)
+
+    server = TikTokLiveServer(event_source=fake_source)
+    server.comment_batch_size = args.batch_comments
+    server.comment_batch_delay = args.batch_delay_ms / 1000
+    if fake_source is not None:
+        # Ejecución determinista: reconexiones escaladas a la velocidad del guion y
+        # rondas activadas por el propio guion
+        server.reconnect_base_delay = 5 / args.fake_speed
+        fake_source.on_round = server.update_game_state
     
     # Determinar qué usuario usar
     username_to_use = None
     if args.username:
         username_to_use = args.username
+    elif fake_source is not None:
+        username_to_use = 'fake_streamer'
     elif args.auto_start and server.game_state.streamer_username:
         username_to_use = server.game_state.streamer_username
     
@@ -526,6 +796,17 @@ async def main():
     else:
         print("SERVIDOR corriendo, esperando comando de conexion...")
 
+    if fake_source is not None:
+        # Al terminar el guion se imprimen las métricas y el proceso termina
+        await fake_source.finished.wait()
+        await server.flush_comments()
+        await server.wait_for_winners()
+        server.round_stats.end_round()
+        print("FAKE " + json.dumps({'source': fake_source.stats(), 'status': server.get_status()}, ensure_ascii=False))
+        await server.disconnect_from_live()
+        await server.avatar_cache.close()
+        return
+
     try:
         # Mantener el servidor corriendo
         while True:
@@ -535,6 +816,9 @@ async def main():
         server.stdin_listener_running = False  # Detener stdin listener
         await server.disconnect_from_live()
         sys.exit(0)
+    finally:
+        # Cerrar la sesión HTTP de las descargas de avatares
+        await server.avatar_cache.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
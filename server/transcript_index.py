@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Transcript Index - Índice invertido de los comentarios del stream
+Cada palabra normalizada apunta a los comentarios (usuario, hora) que la
+contienen, en segmentos de tiempo que se descartan al superar la edad máxima.
+No se guarda el texto de los comentarios, solo quién y cuándo. Cada segmento
+tiene su propia tabla de usuarios, así que descartar un segmento libera también
+a los usuarios que solo comentaron en él.
+"""
+
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Optional, Dict, List, Any
+
+# Tope de resultados por búsqueda (la respuesta viaja en una sola línea de stdout)
+MAX_TRANSCRIPT_RESULTS = 500
+
+
+class TranscriptSegment:
+    """Bloque de comentarios de un intervalo de tiempo"""
+    __slots__ = ('started_at', 'user_index', 'users', 'user_ids', 'timestamps', 'postings')
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        # Usuarios del segmento: unique_id -> id entero, e id -> (unique_id, username)
+        self.user_index: Dict[str, int] = {}
+        self.users: List[tuple] = []
+        # Comentario i del segmento: user_ids[i], timestamps[i]
+        self.user_ids = array('I')
+        self.timestamps = array('d')
+        # palabra -> índices de comentarios del segmento
+        self.postings: Dict[str, array] = {}
+
+
+class TranscriptIndex:
+    def __init__(self, segment_seconds: float = 900, max_age_seconds: float = 12 * 3600):
+        self.segment_seconds = segment_seconds
+        self.max_age_seconds = max_age_seconds
+        self.segments: deque = deque()
+        self.lock = threading.Lock()
+        self.comment_count = 0
+
+    def add(self, unique_id: str, username: str, normalized_comment: str, timestamp: Optional[float] = None):
+        """Indexar un comentario ya normalizado"""
+        tokens = set(normalized_comment.split())
+        if not tokens:
+            return
+        now = timestamp if timestamp is not None else time.time()
+
+        with self.lock:
+            if not self.segments or now - self.segments[-1].started_at >= self.segment_seconds:
+                self.segments.append(TranscriptSegment(now))
+                self.evict(now)
+
+            segment = self.segments[-1]
+            user_id = segment.user_index.get(unique_id)
+            if user_id is None:
+                user_id = len(segment.users)
+                segment.user_index[unique_id] = user_id
+                segment.users.append((unique_id, username))
+
+            comment_id = len(segment.user_ids)
+            segment.user_ids.append(user_id)
+            segment.timestamps.append(now)
+            for token in tokens:
+                postings = segment.postings.get(token)
+                if postings is None:
+                    postings = segment.postings[token] = array('I')
+                postings.append(comment_id)
+            self.comment_count += 1
+
+    def evict(self, now: float):
+        """Descartar segmentos completos más viejos que la edad máxima"""
+        while len(self.segments) > 1 and now - self.segments[1].started_at > self.max_age_seconds:
+            old = self.segments.popleft()
+            self.comment_count -= len(old.user_ids)
+
+    def search(self, normalized_query: str, limit: int = 50,
+               since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Comentarios que contienen todas las palabras de la consulta (más recientes primero)"""
+        tokens = set(normalized_query.split())
+        if not tokens:
+            return []
+
+        results: List[Dict[str, Any]] = []
+        with self.lock:
+            for segment in reversed(self.segments):
+                if until is not None and segment.started_at > until:
+                    continue
+
+                lists = [segment.postings.get(token) for token in tokens]
+                if any(postings is None for postings in lists):
+                    continue
+                lists.sort(key=len)
+                matches = set(lists[0])
+                for postings in lists[1:]:
+                    matches.intersection_update(postings)
+
+                for comment_id in sorted(matches, reverse=True):
+                    timestamp = segment.timestamps[comment_id]
+                    if until is not None and timestamp > until:
+                        continue
+                    if since is not None and timestamp < since:
+                        return results
+                    unique_id, username = segment.users[segment.user_ids[comment_id]]
+                    results.append({'unique_id': unique_id, 'username': username, 'timestamp': timestamp})
+                    if len(results) >= limit:
+                        return results
+
+                if since is not None and segment.started_at < since:
+                    break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'comments': self.comment_count,
+                'segments': len(self.segments),
+                'users': len(set().union(*(segment.user_index for segment in self.segments))),
+                'tokens': sum(len(segment.postings) for segment in self.segments)
+            }